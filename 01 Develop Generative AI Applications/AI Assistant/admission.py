@@ -0,0 +1,170 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from tracing import METRICS
+
+# Admission control in front of the model calls.
+# Each model gets a bounded FIFO queue in front of a fixed number of in-flight slots.
+# A request is shed (HTTP 429 + Retry-After) instead of queued when the queue is full,
+# when its expected wait already exceeds the queue deadline, or when the deadline passes
+# while it waits. Admitted requests therefore see bounded latency even when watsonx slows
+# down and arrivals outpace it, instead of every request timing out together.
+
+class Overloaded(Exception):
+    """Raised when a request is shed; retry_after is a hint in whole seconds"""
+
+    def __init__(self, model, reason, retry_after):
+        super().__init__(f"Model '{model}' is overloaded ({reason}), retry after {retry_after}s")
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+
+class ModelQueue:
+    """Slot and queue bookkeeping for one model"""
+
+    def __init__(self, max_concurrency, max_queue_depth, queue_timeout):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        # Exponentially weighted average service time, seeded with a pessimistic guess
+        self.service_time = 1.0
+
+    def expected_wait(self, position):
+        return position * self.service_time / self.max_concurrency
+
+    def retry_after(self):
+        return max(1, math.ceil(self.expected_wait(self.waiting + 1)))
+
+    def check_admission(self, model):
+        # Fast path: a free slot and nobody ahead in the queue
+        if self.in_flight < self.max_concurrency and self.waiting == 0:
+            return False
+        if self.waiting >= self.max_queue_depth:
+            self.shed(model, 'queue_full')
+        if self.expected_wait(self.waiting + 1) > self.queue_timeout:
+            self.shed(model, 'expected_wait')
+        return True
+
+    def shed(self, model, reason):
+        METRICS.record_shed(model, reason)
+        raise Overloaded(model, reason, self.retry_after())
+
+    def record_service_time(self, seconds):
+        self.service_time = 0.8 * self.service_time + 0.2 * seconds
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'service_time': round(self.service_time, 3),
+        }
+
+class AdmissionController:
+    """Per-model admission queues for the threaded (Flask) app"""
+
+    def __init__(self, max_concurrency, max_queue_depth, queue_timeout):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._queues = {}
+
+    def _queue(self, model):
+        with self._lock:
+            if model not in self._queues:
+                queue = ModelQueue(self.max_concurrency, self.max_queue_depth, self.queue_timeout)
+                queue.condition = threading.Condition()
+                self._queues[model] = queue
+            return self._queues[model]
+
+    def acquire(self, model):
+        queue = self._queue(model)
+        with queue.condition:
+            if queue.check_admission(model):
+                queue.waiting += 1
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while queue.in_flight >= queue.max_concurrency:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            queue.shed(model, 'queue_timeout')
+                        queue.condition.wait(remaining)
+                finally:
+                    queue.waiting -= 1
+            queue.in_flight += 1
+        return time.monotonic()
+
+    def release(self, model, admitted_at):
+        queue = self._queue(model)
+        with queue.condition:
+            queue.in_flight -= 1
+            queue.record_service_time(time.monotonic() - admitted_at)
+            queue.condition.notify()
+
+    @contextmanager
+    def admit(self, model):
+        admitted_at = self.acquire(model)
+        try:
+            yield
+        finally:
+            self.release(model, admitted_at)
+
+    def stats(self):
+        with self._lock:
+            return {model: queue.stats() for model, queue in self._queues.items()}
+
+class AsyncAdmissionController:
+    """Per-model admission queues for the asyncio (ASGI) app"""
+
+    def __init__(self, max_concurrency, max_queue_depth, queue_timeout):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self._queues = {}
+
+    def _queue(self, model):
+        # Created lazily so the Condition binds to the running event loop
+        if model not in self._queues:
+            queue = ModelQueue(self.max_concurrency, self.max_queue_depth, self.queue_timeout)
+            queue.condition = asyncio.Condition()
+            self._queues[model] = queue
+        return self._queues[model]
+
+    async def acquire(self, model):
+        queue = self._queue(model)
+        async with queue.condition:
+            if queue.check_admission(model):
+                queue.waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        queue.condition.wait_for(lambda: queue.in_flight < queue.max_concurrency),
+                        self.queue_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    queue.shed(model, 'queue_timeout')
+                finally:
+                    queue.waiting -= 1
+            queue.in_flight += 1
+        return time.monotonic()
+
+    async def release(self, model, admitted_at):
+        queue = self._queue(model)
+        async with queue.condition:
+            queue.in_flight -= 1
+            queue.record_service_time(time.monotonic() - admitted_at)
+            queue.condition.notify()
+
+    @asynccontextmanager
+    async def admit(self, model):
+        admitted_at = await self.acquire(model)
+        try:
+            yield
+        finally:
+            await self.release(model, admitted_at)
+
+    def stats(self):
+        return {model: queue.stats() for model, queue in self._queues.items()}
@@ -1,9 +1,33 @@
-from flask import Flask, request, jsonify, render_template
-from model import llama3_response, granite_response, mixtral_response
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
+from model import llama3_response, granite_response, mixtral_response, compare_models, stream_ai_response, MODELS, MODEL_RESPONSES
+from config import SYSTEM_PROMPT, COMPARE_DEADLINE_SECONDS
+from config import ADMISSION_MAX_CONCURRENCY_PER_MODEL, ADMISSION_MAX_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT_SECONDS
+from tracing import RequestTrace, METRICS
+from config import ROUTER_SHORT_ORDER, ROUTER_LONG_ORDER, ROUTER_SHORT_PROMPT_TOKENS, ROUTER_SLO_SECONDS, ROUTER_ATTEMPT_TIMEOUT_SECONDS, ROUTER_LOG_PATH
+from admission import AdmissionController, Overloaded
+from router import ModelRouter
+import json
 import time
 
 app = Flask(__name__)
 
+SSE_HEADERS = {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Bounded per-model queues in front of the model calls (see admission.py)
+admission = AdmissionController(ADMISSION_MAX_CONCURRENCY_PER_MODEL, ADMISSION_MAX_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT_SECONDS)
+
+# Picks a model for model='auto' requests and learns per-model latency from every call
+router = ModelRouter(ROUTER_SHORT_ORDER, ROUTER_LONG_ORDER, ROUTER_SHORT_PROMPT_TOKENS, ROUTER_SLO_SECONDS,
+                     ROUTER_ATTEMPT_TIMEOUT_SECONDS, log_path=ROUTER_LOG_PATH)
+
+def overloaded_response(error):
+    response = jsonify({"error": str(error)})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
 @app.route('/', methods=['GET'])
 def index():
     return render_template('index.html')
@@ -17,24 +41,140 @@ def generate():
     if not user_message or not model:
         return jsonify({"error": "Missing message or model selection"}), 400
     
-    system_prompt = "You are an AI assistant helping with customer inquiries. Provide a helpful and concise response."
+    system_prompt = SYSTEM_PROMPT
     
     start_time = time.time()
+    trace = RequestTrace()
+    
+    if model == 'auto':
+        return generate_auto(system_prompt, user_message, start_time, data.get('timings') or request.args.get('timings'))
+    
+    if model not in MODELS:
+        return jsonify({"error": "Invalid model selection"}), 400
+    
+    try:
+        with trace.time_stage('queue'):
+            admitted_at = admission.acquire(model)
+    except Overloaded as e:
+        return overloaded_response(e)
     
     try:
         if model == 'llama3':
-            result = llama3_response(system_prompt, user_message)
+            result = llama3_response(system_prompt, user_message, trace)
         elif model == 'granite':
-            result = granite_response(system_prompt, user_message)
+            result = granite_response(system_prompt, user_message, trace)
         elif model == 'mixtral':
-            result = mixtral_response(system_prompt, user_message)
-        else:
-            return jsonify({"error": "Invalid model selection"}), 400
+            result = mixtral_response(system_prompt, user_message, trace)
         
         result['duration'] = time.time() - start_time
+        router.observe(model, result['duration'])
+        # Per-stage breakdown on request: {"timings": true} in the body or ?timings=1
+        if data.get('timings') or request.args.get('timings'):
+            result['timings'] = trace.timings()
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        admission.release(model, admitted_at)
+
+def generate_auto(system_prompt, user_message, start_time, want_timings):
+    traces = {}
+
+    def call(name):
+        traces[name] = RequestTrace()
+        with admission.admit(name):
+            return MODEL_RESPONSES[name](system_prompt, user_message, traces[name])
+
+    try:
+        name, result, decision = router.route(user_message, call)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+    result['duration'] = time.time() - start_time
+    result['model'] = name
+    result['fallbacks'] = len(decision['attempts']) - 1
+    if want_timings:
+        result['timings'] = traces[name].timings()
+    return jsonify(result)
+
+@app.route('/generate/compare', methods=['POST'])
+def generate_compare():
+    data = request.json
+    user_message = data.get('message')
+    deadline = float(data.get('deadline', COMPARE_DEADLINE_SECONDS))
+
+    if not user_message:
+        return jsonify({"error": "Missing message"}), 400
+
+    # One JSON line per model, streamed as soon as that model finishes;
+    # each call is admitted separately, so a shed model reports its own error line
+    def stream_results():
+        for result in compare_models(SYSTEM_PROMPT, user_message, deadline, admit=admission.admit):
+            yield json.dumps(result) + "\n"
+
+    return Response(stream_with_context(stream_results()), mimetype='application/x-ndjson')
+
+@app.route('/generate/stream', methods=['POST'])
+def generate_stream():
+    data = request.json
+    user_message = data.get('message')
+    model = data.get('model')
+
+    if not user_message or not model:
+        return jsonify({"error": "Missing message or model selection"}), 400
+
+    if model not in MODELS and model != 'auto':
+        return jsonify({"error": "Invalid model selection"}), 400
+
+    want_timings = data.get('timings') or request.args.get('timings')
+
+    # 'auto' streams from the router's first choice; there is no fallback once tokens are flowing
+    decision = None
+    if model == 'auto':
+        decision = router.plan(user_message)
+        model = decision['candidates'][0]
+
+    # Admit before the response starts so an overloaded model can still answer 429
+    start_time = time.time()
+    trace = RequestTrace()
+    try:
+        with trace.time_stage('queue'):
+            admitted_at = admission.acquire(model)
+    except Overloaded as e:
+        if decision:
+            router.record_single(decision, model, 'shed', time.time() - start_time)
+        return overloaded_response(e)
+
+    # Server-sent events: one 'partial' event whenever a field fills in, then 'done'
+    def stream_events():
+        result = {}
+        try:
+            for partial in stream_ai_response(model, SYSTEM_PROMPT, user_message, trace):
+                if partial and partial != result:
+                    result = partial
+                    yield sse_event('partial', result)
+            done = {**result, 'duration': time.time() - start_time}
+            router.observe(model, done['duration'])
+            if decision:
+                done['model'] = model
+                router.record_single(decision, model, 'ok', done['duration'])
+            if want_timings:
+                done['timings'] = trace.timings()
+            yield sse_event('done', done)
+        except Exception as e:
+            if decision:
+                router.record_single(decision, model, 'error', time.time() - start_time, str(e))
+            yield sse_event('error', {'error': str(e)})
+
+    response = Response(stream_with_context(stream_events()), headers=SSE_HEADERS)
+    # Release on close rather than in the generator, which never runs if the client leaves early
+    response.call_on_close(lambda: admission.release(model, admitted_at))
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus text format; counters are per process, so scrape every worker
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
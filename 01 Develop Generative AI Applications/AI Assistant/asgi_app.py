@@ -0,0 +1,205 @@
+from quart import Quart, request, jsonify, render_template
+from model import ASYNC_MODEL_RESPONSES, MODELS, acompare_models, astream_ai_response
+from config import SYSTEM_PROMPT, SERVER_HOST, SERVER_PORT, COMPARE_DEADLINE_SECONDS
+from config import MAX_CONCURRENT_REQUESTS_PER_MODEL, ADMISSION_MAX_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT_SECONDS
+from tracing import RequestTrace, METRICS
+from config import ROUTER_SHORT_ORDER, ROUTER_LONG_ORDER, ROUTER_SHORT_PROMPT_TOKENS, ROUTER_SLO_SECONDS, ROUTER_ATTEMPT_TIMEOUT_SECONDS, ROUTER_LOG_PATH
+from admission import AsyncAdmissionController, Overloaded
+from router import ModelRouter
+import json
+import time
+
+# Async serving mode: same routes as app.py, but each /generate awaits the watsonx call
+# instead of holding a worker thread, so one process can keep hundreds of requests in flight.
+#
+# Production:  hypercorn asgi_app:app --bind 0.0.0.0:8000 --workers 4
+# or simply:   python asgi_app.py
+app = Quart(__name__)
+
+class CloseCallbacks:
+    """ASGI middleware that runs a request's on-close callbacks once Quart is done with it.
+
+    Quart cancels the request task when the client disconnects, possibly before a streamed
+    body has started, so a generator's finally is not a reliable place to free resources.
+    This runs after the response was sent, failed or was abandoned, like call_on_close in app.py.
+    """
+
+    def __init__(self, asgi_app):
+        self.asgi_app = asgi_app
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.asgi_app(scope, receive, send)
+        finally:
+            for callback in scope.pop('on_close', []):
+                await callback()
+
+def call_on_close(callback):
+    request.scope.setdefault('on_close', []).append(callback)
+
+app.asgi_app = CloseCallbacks(app.asgi_app)
+
+SSE_HEADERS = {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Bounded per-model queues in front of the model calls (see admission.py)
+admission = AsyncAdmissionController(MAX_CONCURRENT_REQUESTS_PER_MODEL, ADMISSION_MAX_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT_SECONDS)
+
+# Picks a model for model='auto' requests and learns per-model latency from every call
+router = ModelRouter(ROUTER_SHORT_ORDER, ROUTER_LONG_ORDER, ROUTER_SHORT_PROMPT_TOKENS, ROUTER_SLO_SECONDS,
+                     ROUTER_ATTEMPT_TIMEOUT_SECONDS, log_path=ROUTER_LOG_PATH)
+
+def overloaded_response(error):
+    return jsonify({"error": str(error)}), 429, {'Retry-After': str(error.retry_after)}
+
+@app.route('/', methods=['GET'])
+async def index():
+    return await render_template('index.html')
+
+@app.route('/generate', methods=['POST'])
+async def generate():
+    data = await request.get_json()
+    user_message = data.get('message')
+    model = data.get('model')
+
+    if not user_message or not model:
+        return jsonify({"error": "Missing message or model selection"}), 400
+
+    start_time = time.time()
+    trace = RequestTrace()
+
+    if model == 'auto':
+        return await generate_auto(user_message, start_time, data.get('timings') or request.args.get('timings'))
+
+    if model not in ASYNC_MODEL_RESPONSES:
+        return jsonify({"error": "Invalid model selection"}), 400
+
+    try:
+        with trace.time_stage('queue'):
+            admitted_at = await admission.acquire(model)
+    except Overloaded as e:
+        return overloaded_response(e)
+
+    try:
+        result = await ASYNC_MODEL_RESPONSES[model](SYSTEM_PROMPT, user_message, trace)
+        result['duration'] = time.time() - start_time
+        router.observe(model, result['duration'])
+        # Per-stage breakdown on request: {"timings": true} in the body or ?timings=1
+        if data.get('timings') or request.args.get('timings'):
+            result['timings'] = trace.timings()
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        await admission.release(model, admitted_at)
+
+async def generate_auto(user_message, start_time, want_timings):
+    traces = {}
+
+    async def call(name):
+        traces[name] = RequestTrace()
+        async with admission.admit(name):
+            return await ASYNC_MODEL_RESPONSES[name](SYSTEM_PROMPT, user_message, traces[name])
+
+    try:
+        name, result, decision = await router.aroute(user_message, call)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+    result['duration'] = time.time() - start_time
+    result['model'] = name
+    result['fallbacks'] = len(decision['attempts']) - 1
+    if want_timings:
+        result['timings'] = traces[name].timings()
+    return jsonify(result)
+
+@app.route('/generate/compare', methods=['POST'])
+async def generate_compare():
+    data = await request.get_json()
+    user_message = data.get('message')
+    deadline = float(data.get('deadline', COMPARE_DEADLINE_SECONDS))
+
+    if not user_message:
+        return jsonify({"error": "Missing message"}), 400
+
+    # One JSON line per model, streamed as soon as that model finishes;
+    # each call is admitted separately, so a shed model reports its own error line
+    async def stream_results():
+        async for result in acompare_models(SYSTEM_PROMPT, user_message, deadline, admit=admission.admit):
+            yield json.dumps(result) + "\n"
+
+    return stream_results(), 200, {'Content-Type': 'application/x-ndjson'}
+
+@app.route('/generate/stream', methods=['POST'])
+async def generate_stream():
+    data = await request.get_json()
+    user_message = data.get('message')
+    model = data.get('model')
+
+    if not user_message or not model:
+        return jsonify({"error": "Missing message or model selection"}), 400
+
+    if model not in MODELS and model != 'auto':
+        return jsonify({"error": "Invalid model selection"}), 400
+
+    want_timings = data.get('timings') or request.args.get('timings')
+
+    # 'auto' streams from the router's first choice; there is no fallback once tokens are flowing
+    decision = None
+    if model == 'auto':
+        decision = router.plan(user_message)
+        model = decision['candidates'][0]
+
+    # Admit before the response starts so an overloaded model can still answer 429
+    start_time = time.time()
+    trace = RequestTrace()
+    try:
+        with trace.time_stage('queue'):
+            admitted_at = await admission.acquire(model)
+    except Overloaded as e:
+        if decision:
+            await router.arecord_single(decision, model, 'shed', time.time() - start_time)
+        return overloaded_response(e)
+    call_on_close(lambda: admission.release(model, admitted_at))
+
+    # Server-sent events: one 'partial' event whenever a field fills in, then 'done'
+    async def stream_events():
+        result = {}
+        try:
+            async for partial in astream_ai_response(model, SYSTEM_PROMPT, user_message, trace):
+                if partial and partial != result:
+                    result = partial
+                    yield sse_event('partial', result)
+            done = {**result, 'duration': time.time() - start_time}
+            router.observe(model, done['duration'])
+            if decision:
+                done['model'] = model
+                await router.arecord_single(decision, model, 'ok', done['duration'])
+            if want_timings:
+                done['timings'] = trace.timings()
+            yield sse_event('done', done)
+        except Exception as e:
+            if decision:
+                await router.arecord_single(decision, model, 'error', time.time() - start_time, str(e))
+            yield sse_event('error', {'error': str(e)})
+
+    return stream_events(), 200, SSE_HEADERS
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    # Prometheus text format; counters are per process, so scrape every worker
+    return METRICS.render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+def main():
+    import asyncio
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"{SERVER_HOST}:{SERVER_PORT}"]
+    asyncio.run(serve(app, config))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from itertools import islice
+from pydantic import ValidationError
+from model import AIResponse, CHAINS
+from config import SYSTEM_PROMPT
+
+# Offline batch extraction: customer messages in, AIResponse (summary, sentiment, response) out.
+#
+#   python batch_runner.py tickets.jsonl --model granite --output results.jsonl
+#
+# Input is read lazily (JSONL or CSV), sent to the precompiled chain in chunks with
+# abatch() and bounded concurrency, and every finished chunk is appended to the output
+# files before the checkpoint moves forward. The checkpoint also stores the output file
+# sizes, so a resumed run first truncates anything written after the last checkpoint and
+# each input record ends up in exactly one of results/failures. Without a checkpoint the
+# run starts from scratch, so it refuses to replace non-empty output files unless given
+# --overwrite.
+
+def parse_jsonl(input_file):
+    """Yield (line number, row or the error that made the line unreadable) for non-blank lines"""
+    for line_number, line in enumerate(input_file, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, e
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError(f"Expected a JSON object, got {type(row).__name__}")
+            continue
+        yield line_number, row
+
+def read_records(path, id_field, message_field):
+    """Yield (line number, record id, message, error) without loading the file into memory
+
+    A malformed line is yielded with its error instead of stopping the batch, so it is
+    recorded as a failure and counted by the checkpoint like any other record.
+    """
+    with open(path, newline='', encoding='utf-8') as input_file:
+        if path.lower().endswith('.csv'):
+            # Line 1 is the header
+            rows = enumerate(csv.DictReader(input_file), 2)
+        else:
+            rows = parse_jsonl(input_file)
+        for index, (line_number, row) in enumerate(rows):
+            if isinstance(row, Exception):
+                yield line_number, None, '', row
+            else:
+                yield line_number, row.get(id_field, index), row.get(message_field) or '', None
+
+def load_checkpoint(path, input_path, model, output_paths=(), overwrite=False):
+    if not os.path.exists(path):
+        existing = [output_path for output_path in output_paths
+                    if os.path.exists(output_path) and os.path.getsize(output_path) > 0]
+        if existing and not overwrite:
+            raise SystemExit(f"Output already exists ({', '.join(existing)}) but there is no checkpoint {path}; "
+                             "pass --overwrite to start over or choose another --output")
+        return {'input': input_path, 'model': model, 'records_done': 0,
+                'output_offset': 0, 'failures_offset': 0, 'succeeded': 0, 'failed': 0}
+    with open(path) as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if checkpoint['input'] != input_path or checkpoint['model'] != model:
+        raise SystemExit(f"Checkpoint {path} belongs to {checkpoint['input']} / {checkpoint['model']}; "
+                         "remove it or choose another --output")
+    return checkpoint
+
+def save_checkpoint(path, checkpoint):
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temp_path, path)
+
+def open_at(path, offset):
+    """Open for appending after dropping anything written past the checkpointed offset"""
+    output_file = open(path, 'a+b')
+    output_file.truncate(offset)
+    output_file.seek(offset)
+    return output_file
+
+def classify(record_id, line_number, message, outcome):
+    if isinstance(outcome, Exception):
+        return None, {'id': record_id, 'line': line_number, 'message': message,
+                      'error_type': type(outcome).__name__, 'error': str(outcome)}
+    try:
+        return {'id': record_id, **AIResponse.model_validate(outcome).model_dump()}, None
+    except ValidationError as e:
+        return None, {'id': record_id, 'line': line_number, 'message': message, 'error_type': 'ValidationError',
+                      'error': str(e), 'output': outcome}
+
+async def run_batch(input_path, model, output_path, failures_path, checkpoint_path,
+                    concurrency=16, chunk_size=256, system_prompt=SYSTEM_PROMPT,
+                    id_field='id', message_field='message', overwrite=False):
+    chain = CHAINS[model]
+    checkpoint = load_checkpoint(checkpoint_path, input_path, model, (output_path, failures_path), overwrite)
+    if checkpoint['records_done']:
+        print(f"Resuming after {checkpoint['records_done']} records")
+
+    records = islice(read_records(input_path, id_field, message_field), checkpoint['records_done'], None)
+    start_time = time.time()
+    processed = 0
+
+    with open_at(output_path, checkpoint['output_offset']) as output_file, \
+            open_at(failures_path, checkpoint['failures_offset']) as failures_file:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            inputs = [{'system_prompt': system_prompt, 'user_prompt': message}
+                      for _, _, message, error in chunk if error is None]
+            # return_exceptions keeps one bad record (unparseable JSON, API error) from failing the chunk
+            outcomes = iter(await chain.abatch(inputs, config={'max_concurrency': concurrency}, return_exceptions=True))
+
+            for line_number, record_id, message, error in chunk:
+                if error is not None:
+                    result, failure = None, {'id': record_id, 'line': line_number, 'message': message,
+                                             'error_type': type(error).__name__, 'error': str(error)}
+                else:
+                    result, failure = classify(record_id, line_number, message, next(outcomes))
+                if result is not None:
+                    output_file.write((json.dumps(result) + "\n").encode('utf-8'))
+                    checkpoint['succeeded'] += 1
+                else:
+                    failures_file.write((json.dumps(failure) + "\n").encode('utf-8'))
+                    checkpoint['failed'] += 1
+
+            for output in (output_file, failures_file):
+                output.flush()
+                os.fsync(output.fileno())
+            checkpoint['records_done'] += len(chunk)
+            checkpoint['output_offset'] = output_file.tell()
+            checkpoint['failures_offset'] = failures_file.tell()
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            processed += len(chunk)
+            rate = processed / (time.time() - start_time)
+            print(f"{checkpoint['records_done']} records done "
+                  f"({checkpoint['succeeded']} ok, {checkpoint['failed']} failed) - {rate:.1f} records/s")
+
+    return checkpoint
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the AI Assistant extractor over a JSONL/CSV file of messages")
+    parser.add_argument('input', help="JSONL or CSV file with one message per record")
+    parser.add_argument('--model', choices=sorted(CHAINS), default='granite')
+    parser.add_argument('--output', default='results.jsonl')
+    parser.add_argument('--failures', default=None, help="Defaults to <output>.failures.jsonl")
+    parser.add_argument('--checkpoint', default=None, help="Defaults to <output>.checkpoint.json")
+    parser.add_argument('--concurrency', type=int, default=16, help="Maximum in-flight model calls")
+    parser.add_argument('--chunk-size', type=int, default=256, help="Records per checkpoint")
+    parser.add_argument('--id-field', default='id')
+    parser.add_argument('--message-field', default='message')
+    parser.add_argument('--system-prompt', default=SYSTEM_PROMPT)
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Replace existing output files when there is no checkpoint to resume from")
+    args = parser.parse_args()
+
+    stem = os.path.splitext(args.output)[0]
+    failures_path = args.failures or stem + '.failures.jsonl'
+    checkpoint_path = args.checkpoint or stem + '.checkpoint.json'
+
+    checkpoint = asyncio.run(run_batch(
+        args.input, args.model, args.output, failures_path, checkpoint_path,
+        args.concurrency, args.chunk_size, args.system_prompt, args.id_field, args.message_field,
+        args.overwrite,
+    ))
+    print(f"\nFinished: {checkpoint['succeeded']} results in {args.output}, "
+          f"{checkpoint['failed']} failures in {failures_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import json
+import timeit
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from model import json_parser, get_chain, llama3_template, granite_template, mixtral_template
+
+# Microbenchmark of the per-request Python overhead in get_ai_response.
+# A fake chat model returns a canned answer instantly, so the timings measure only
+# chain construction, prompt formatting and JSON parsing - no network, no generation.
+
+ITERATIONS = 2000
+
+CANNED_RESPONSE = json.dumps({
+    "summary": "Customer asks about a delayed order",
+    "sentiment": 35,
+    "response": "Sorry for the delay - your order ships tomorrow.",
+})
+
+INPUTS = {
+    'system_prompt': "You are an AI assistant helping with customer inquiries.",
+    'user_prompt': "Where is my order? It was due last week.",
+}
+
+def per_request_chain(model, template):
+    # Previous behaviour: rebuild the chain and format instructions on every call
+    chain = template | model | json_parser
+    return chain.invoke({**INPUTS, 'format_prompt': json_parser.get_format_instructions()})
+
+def cached_chain(model, template):
+    return get_chain(model, template).invoke(INPUTS)
+
+def construction_only(model, template):
+    template | model | json_parser
+    json_parser.get_format_instructions()
+
+fake_model = FakeListChatModel(responses=[CANNED_RESPONSE])
+
+if __name__ == '__main__':
+    print(f"Per-request overhead ({ITERATIONS} requests per template, fake model)")
+    print("-" * 60)
+    for name, template in (('llama3', llama3_template), ('granite', granite_template), ('mixtral', mixtral_template)):
+        before = timeit.timeit(lambda: per_request_chain(fake_model, template), number=ITERATIONS) / ITERATIONS
+        after = timeit.timeit(lambda: cached_chain(fake_model, template), number=ITERATIONS) / ITERATIONS
+        print(f"{name:8} before: {before * 1e6:8.1f} us   after: {after * 1e6:8.1f} us   saved: {(before - after) / before:.0%}")
+
+    construction = timeit.timeit(lambda: construction_only(fake_model, llama3_template), number=ITERATIONS) / ITERATIONS
+    print(f"\nChain construction + format instructions alone: {construction * 1e6:.1f} us per request")
@@ -16,4 +16,39 @@ CREDENTIALS = {
 # Model IDs
 LLAMA3_MODEL_ID = "meta-llama/llama-3-2-11b-vision-instruct"
 GRANITE_MODEL_ID = "ibm/granite-3-8b-instruct"
-MIXTRAL_MODEL_ID = "mistralai/mistral-large"
\ No newline at end of file
+MIXTRAL_MODEL_ID = "mistralai/mistral-large"
+
+# System prompt used by the web apps
+SYSTEM_PROMPT = "You are an AI assistant helping with customer inquiries. Provide a helpful and concise response."
+
+# Async serving (asgi_app.py)
+# Maximum number of in-flight watsonx requests per model; further requests wait their turn
+MAX_CONCURRENT_REQUESTS_PER_MODEL = 64
+SERVER_HOST = "0.0.0.0"
+SERVER_PORT = 8000
+
+# Overall deadline (seconds) for /generate/compare, which queries all models concurrently
+COMPARE_DEADLINE_SECONDS = 60
+
+# Response cache: with greedy decoding identical requests give identical answers
+# Backend: "memory" (in-process LRU), "sqlite" (file shared across workers) or None to disable
+RESPONSE_CACHE_BACKEND = "memory"
+RESPONSE_CACHE_TTL_SECONDS = 3600
+RESPONSE_CACHE_MAX_ENTRIES = 10000
+RESPONSE_CACHE_PATH = "response_cache.sqlite3"
+
+# Admission control: per-model in-flight slots, queue length and queue-time deadline.
+# Requests beyond these limits get HTTP 429 with Retry-After instead of piling up.
+ADMISSION_MAX_CONCURRENCY_PER_MODEL = 8
+ADMISSION_MAX_QUEUE_DEPTH = 32
+ADMISSION_QUEUE_TIMEOUT_SECONDS = 10
+
+# 'auto' model routing (router.py)
+# Prompts up to ROUTER_SHORT_PROMPT_TOKENS (estimated) try the models in ROUTER_SHORT_ORDER, longer ones ROUTER_LONG_ORDER.
+# Models whose rolling p95 latency exceeds the SLO are tried last; an attempt slower than the timeout falls back.
+ROUTER_SHORT_ORDER = ["granite", "llama3", "mixtral"]
+ROUTER_LONG_ORDER = ["mixtral", "llama3", "granite"]
+ROUTER_SHORT_PROMPT_TOKENS = 200
+ROUTER_SLO_SECONDS = 5
+ROUTER_ATTEMPT_TIMEOUT_SECONDS = 15
+ROUTER_LOG_PATH = "router_decisions.jsonl"
\ No newline at end of file
@@ -1,14 +1,13 @@
-from model import llama3_response, granite_response, mixtral_response
+from model import compare_models
 
 def call_all_models(system_prompt, user_prompt):
-    llama_result = llama3_response(system_prompt, user_prompt)
-    granite_result = granite_response(system_prompt, user_prompt)
-    mixtral_result = mixtral_response(system_prompt, user_prompt)
-
-    print("Llama3 Response:\n", llama_result.content)
-    print("\nGranite Response:\n", granite_result.content)
-    print("\nMixtral Response:\n", mixtral_result.content)
+    # All three models are queried concurrently; each result prints as soon as it arrives
+    for result in compare_models(system_prompt, user_prompt):
+        name = result['model'].capitalize()
+        if 'error' in result:
+            print(f"\n{name} Error ({result['duration']:.2f}s):\n", result['error'])
+        else:
+            print(f"\n{name} Response ({result['duration']:.2f}s):\n", result['response'])
 
 # Example call to test all models
 call_all_models("You are a helpful assistant who provides concise and accurate answers", "What is the capital of Canada? Tell me a cool fact about it as well")
-
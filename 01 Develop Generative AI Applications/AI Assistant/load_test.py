@@ -0,0 +1,75 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import app
+from admission import AdmissionController
+from config import ADMISSION_MAX_CONCURRENCY_PER_MODEL, ADMISSION_MAX_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT_SECONDS
+
+# Local overload test for admission control - no watsonx calls.
+# The model call is replaced by a stub with fixed capacity (BACKEND_SLOTS concurrent
+# requests, SERVICE_TIME seconds each), and /generate is driven open-loop at
+# OVERLOAD_FACTOR times that capacity. Without admission control every request queues
+# and latency grows for the whole run; with it, excess requests get 429 + Retry-After
+# and the admitted ones keep a flat latency.
+
+BACKEND_SLOTS = ADMISSION_MAX_CONCURRENCY_PER_MODEL
+SERVICE_TIME = 0.2
+OVERLOAD_FACTOR = 5
+DURATION = 5
+
+backend = threading.Semaphore(BACKEND_SLOTS)
+
+def stub_response(system_prompt, user_prompt, trace=None):
+    with backend:
+        time.sleep(SERVICE_TIME)
+    return {'summary': 'stub', 'sentiment': 50, 'response': 'stub'}
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def run_load(admission):
+    app.admission = admission
+    app.llama3_response = stub_response
+    client = app.app.test_client()
+    rate = OVERLOAD_FACTOR * BACKEND_SLOTS / SERVICE_TIME
+    total = int(rate * DURATION)
+    results = []
+
+    def send(scheduled):
+        response = client.post('/generate', json={'message': 'Where is my order?', 'model': 'llama3'})
+        results.append((scheduled, response.status_code, time.time() - scheduled, response.headers.get('Retry-After')))
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=total) as executor:
+        for i in range(total):
+            scheduled = start + i / rate
+            time.sleep(max(0.0, scheduled - time.time()))
+            executor.submit(send, scheduled)
+    return start, results
+
+def report(name, start, results):
+    served = [latency for _, status, latency, _ in results if status == 200]
+    shed = [retry_after for _, status, _, retry_after in results if status == 429]
+    last_second = [latency for scheduled, status, latency, _ in results
+                   if status == 200 and scheduled - start >= DURATION - 1]
+    print(f"\n{name}")
+    print("-" * 60)
+    print(f"Sent: {len(results)}   served: {len(served)}   shed (429): {len(shed)}")
+    print(f"Served latency  p50: {percentile(served, 50):6.2f}s   p95: {percentile(served, 95):6.2f}s   p99: {percentile(served, 99):6.2f}s")
+    print(f"Requests sent in the last second  p99: {percentile(last_second, 99):6.2f}s")
+    if shed:
+        print(f"Retry-After hints: {statistics.median(int(value) for value in shed)}s median")
+
+if __name__ == '__main__':
+    capacity = BACKEND_SLOTS / SERVICE_TIME
+    print(f"Stub capacity {capacity:.0f} req/s, offered {OVERLOAD_FACTOR}x = {OVERLOAD_FACTOR * capacity:.0f} req/s for {DURATION}s")
+
+    unbounded = AdmissionController(10 ** 6, 10 ** 6, float('inf'))
+    report("Without admission control", *run_load(unbounded))
+
+    bounded = AdmissionController(ADMISSION_MAX_CONCURRENCY_PER_MODEL, ADMISSION_MAX_QUEUE_DEPTH, ADMISSION_QUEUE_TIMEOUT_SECONDS)
+    report("With admission control", *run_load(bounded))
@@ -1,9 +1,17 @@
+import asyncio
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from langchain_ibm import WatsonxLLM
 from langchain_ibm import ChatWatsonx
 from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from pydantic import BaseModel, Field
-from config import PARAMETERS, CREDENTIALS, LLAMA3_MODEL_ID, GRANITE_MODEL_ID, MIXTRAL_MODEL_ID
+from pydantic import BaseModel, Field, ValidationError
+from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
+from config import PARAMETERS, CREDENTIALS, LLAMA3_MODEL_ID, GRANITE_MODEL_ID, MIXTRAL_MODEL_ID, MAX_CONCURRENT_REQUESTS_PER_MODEL, COMPARE_DEADLINE_SECONDS
+from config import RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_PATH
+from response_cache import cache_key, create_response_cache, SingleFlight, AsyncSingleFlight
+from tracing import RequestTrace
 
 # Define JSON output structure
 class AIResponse(BaseModel):
@@ -48,17 +56,245 @@ mixtral_template = PromptTemplate(
     input_variables=["system_prompt", "format_prompt", "user_prompt"]
 )
 
-def get_ai_response(model, template, system_prompt, user_prompt):
-    chain = template | model | json_parser
-    return chain.invoke({'system_prompt':system_prompt, 'user_prompt':user_prompt, 'format_prompt':json_parser.get_format_instructions()})
+# The AIResponse schema never changes, so the format instructions are computed once
+format_instructions = json_parser.get_format_instructions()
+
+# Chains are compiled once per (model, template) pair and reused by every request
+compiled_chains = {}
+
+def get_chain(model, template):
+    key = (id(model), id(template))
+    if key not in compiled_chains:
+        compiled_chains[key] = template.partial(format_prompt=format_instructions) | model | json_parser
+    return compiled_chains[key]
+
+# Precompile the chains for the built-in models at startup
+MODELS = {
+    'llama3': (llama3_llm, llama3_template),
+    'granite': (granite_llm, granite_template),
+    'mixtral': (mixtral_llm, mixtral_template),
+}
+
+CHAINS = {name: get_chain(model, template) for name, (model, template) in MODELS.items()}
+
+# Responses are only reproducible (and therefore cacheable) with greedy decoding
+response_cache = None
+if PARAMETERS.get(GenParams.DECODING_METHOD) == "greedy":
+    response_cache = create_response_cache(RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_PATH)
+
+# Concurrent identical requests share one upstream call
+single_flight = SingleFlight()
+async_single_flight = AsyncSingleFlight()
+
+# Every call is traced (see tracing.py); pass a RequestTrace to read its timings afterwards
+def get_ai_response(model, template, system_prompt, user_prompt, trace=None):
+    chain = get_chain(model, template)
+    trace = trace or RequestTrace()
+    trace.model_id = model.model_id
+    inputs = {'system_prompt':system_prompt, 'user_prompt':user_prompt}
+    try:
+        if response_cache is None:
+            result = chain.invoke(inputs, config=trace.config())
+        else:
+            key = cache_key(model.model_id, system_prompt, user_prompt)
+            with trace.time_stage('cache'):
+                cached = response_cache.get(key)
+            if cached is not None:
+                trace.finish('cached')
+                return dict(cached)
+
+            def call_model():
+                result = chain.invoke(inputs, config=trace.config())
+                response_cache.set(key, result)
+                return result
+
+            # Callers add fields such as 'duration', so each one gets its own copy
+            result = dict(single_flight.do(key, call_model))
+    except Exception:
+        trace.finish('error')
+        raise
+    trace.finish('ok' if trace.model_attempts else 'coalesced')
+    return result
 
 # Model-specific response functions
-def llama3_response(system_prompt, user_prompt):
-    return get_ai_response(llama3_llm, llama3_template, system_prompt, user_prompt)
+def llama3_response(system_prompt, user_prompt, trace=None):
+    return get_ai_response(llama3_llm, llama3_template, system_prompt, user_prompt, trace)
+
+def granite_response(system_prompt, user_prompt, trace=None):
+    return get_ai_response(granite_llm, granite_template, system_prompt, user_prompt, trace)
+
+def mixtral_response(system_prompt, user_prompt, trace=None):
+    return get_ai_response(mixtral_llm, mixtral_template, system_prompt, user_prompt, trace)
+
+# Async variants used by the ASGI app (asgi_app.py)
+# One semaphore per model bounds in-flight watsonx requests; created lazily inside the running event loop
+model_semaphores = {}
+
+def get_model_semaphore(model):
+    if model.model_id not in model_semaphores:
+        model_semaphores[model.model_id] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS_PER_MODEL)
+    return model_semaphores[model.model_id]
+
+async def aget_ai_response(model, template, system_prompt, user_prompt, trace=None):
+    chain = get_chain(model, template)
+    trace = trace or RequestTrace()
+    trace.model_id = model.model_id
+    inputs = {'system_prompt':system_prompt, 'user_prompt':user_prompt}
+    try:
+        if response_cache is None:
+            async with get_model_semaphore(model):
+                result = await chain.ainvoke(inputs, config=trace.config())
+        else:
+            key = cache_key(model.model_id, system_prompt, user_prompt)
+            with trace.time_stage('cache'):
+                cached = response_cache.get(key)
+            if cached is not None:
+                trace.finish('cached')
+                return dict(cached)
+
+            async def call_model():
+                async with get_model_semaphore(model):
+                    result = await chain.ainvoke(inputs, config=trace.config())
+                response_cache.set(key, result)
+                return result
+
+            result = dict(await async_single_flight.do(key, call_model))
+    except Exception:
+        trace.finish('error')
+        raise
+    trace.finish('ok' if trace.model_attempts else 'coalesced')
+    return result
+
+async def allama3_response(system_prompt, user_prompt, trace=None):
+    return await aget_ai_response(llama3_llm, llama3_template, system_prompt, user_prompt, trace)
+
+async def agranite_response(system_prompt, user_prompt, trace=None):
+    return await aget_ai_response(granite_llm, granite_template, system_prompt, user_prompt, trace)
+
+async def amixtral_response(system_prompt, user_prompt, trace=None):
+    return await aget_ai_response(mixtral_llm, mixtral_template, system_prompt, user_prompt, trace)
+
+# Model name -> response function, as selected by the web UI
+MODEL_RESPONSES = {
+    'llama3': llama3_response,
+    'granite': granite_response,
+    'mixtral': mixtral_response,
+}
+
+ASYNC_MODEL_RESPONSES = {
+    'llama3': allama3_response,
+    'granite': agranite_response,
+    'mixtral': amixtral_response,
+}
+
+# Fan the same prompt out to every model; results are yielded in completion order
+# admit(name) is an optional context manager that holds an admission slot around each call
+def compare_models(system_prompt, user_prompt, deadline=COMPARE_DEADLINE_SECONDS, admit=None):
+    start_time = time.time()
+
+    def timed_call(name, response_fn):
+        try:
+            with admit(name) if admit else nullcontext():
+                result = response_fn(system_prompt, user_prompt)
+            return {'model': name, **result, 'duration': time.time() - start_time}
+        except Exception as e:
+            return {'model': name, 'error': str(e), 'duration': time.time() - start_time}
+
+    executor = ThreadPoolExecutor(max_workers=len(MODEL_RESPONSES))
+    futures = {executor.submit(timed_call, name, fn): name for name, fn in MODEL_RESPONSES.items()}
+    pending = set(futures.values())
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            pending.discard(futures[future])
+            yield future.result()
+    except FuturesTimeoutError:
+        for name in pending:
+            yield {'model': name, 'error': 'Deadline exceeded', 'duration': time.time() - start_time}
+    finally:
+        # Don't wait for stragglers past the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+async def acompare_models(system_prompt, user_prompt, deadline=COMPARE_DEADLINE_SECONDS, admit=None):
+    start_time = time.time()
+
+    async def timed_call(name, response_fn):
+        try:
+            async with admit(name) if admit else nullcontext():
+                result = await response_fn(system_prompt, user_prompt)
+            return {'model': name, **result, 'duration': time.time() - start_time}
+        except Exception as e:
+            return {'model': name, 'error': str(e), 'duration': time.time() - start_time}
+
+    tasks = {asyncio.ensure_future(timed_call(name, fn)): name for name, fn in ASYNC_MODEL_RESPONSES.items()}
+    pending = set(tasks.values())
+    try:
+        for next_result in asyncio.as_completed(tasks, timeout=deadline):
+            result = await next_result
+            pending.discard(result['model'])
+            yield result
+    except asyncio.TimeoutError:
+        for name in pending:
+            yield {'model': name, 'error': 'Deadline exceeded', 'duration': time.time() - start_time}
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def cache_streamed_response(key, result):
+    """Cache the last streamed object only if it is a complete AIResponse"""
+    # A stream cut short (e.g. by max tokens) still ends with a partial object, which the
+    # non-streaming path would have rejected; caching it would serve it to /generate too
+    if response_cache is None or result is None:
+        return
+    try:
+        AIResponse.model_validate(result)
+    except ValidationError:
+        return
+    response_cache.set(key, result)
+
+# Streaming: JsonOutputParser yields the partially parsed object as tokens arrive,
+# so callers can show summary/sentiment/response while the model is still generating
+# A cached answer is sent as a single, complete update
+def stream_ai_response(model_name, system_prompt, user_prompt, trace=None):
+    model, _ = MODELS[model_name]
+    trace = trace or RequestTrace()
+    trace.model_id = model.model_id
+    key = cache_key(model.model_id, system_prompt, user_prompt)
+    with trace.time_stage('cache'):
+        cached = response_cache.get(key) if response_cache is not None else None
+    if cached is not None:
+        trace.finish('cached')
+        yield dict(cached)
+        return
 
-def granite_response(system_prompt, user_prompt):
-    return get_ai_response(granite_llm, granite_template, system_prompt, user_prompt)
+    partial = None
+    try:
+        for partial in CHAINS[model_name].stream({'system_prompt':system_prompt, 'user_prompt':user_prompt}, config=trace.config()):
+            yield partial
+    except Exception:
+        trace.finish('error')
+        raise
+    trace.finish()
+    cache_streamed_response(key, partial)
 
-def mixtral_response(system_prompt, user_prompt):
-    return get_ai_response(mixtral_llm, mixtral_template, system_prompt, user_prompt)
+async def astream_ai_response(model_name, system_prompt, user_prompt, trace=None):
+    model, _ = MODELS[model_name]
+    trace = trace or RequestTrace()
+    trace.model_id = model.model_id
+    key = cache_key(model.model_id, system_prompt, user_prompt)
+    with trace.time_stage('cache'):
+        cached = response_cache.get(key) if response_cache is not None else None
+    if cached is not None:
+        trace.finish('cached')
+        yield dict(cached)
+        return
 
+    partial = None
+    try:
+        async with get_model_semaphore(model):
+            async for partial in CHAINS[model_name].astream({'system_prompt':system_prompt, 'user_prompt':user_prompt}, config=trace.config()):
+                yield partial
+    except Exception:
+        trace.finish('error')
+        raise
+    trace.finish()
+    cache_streamed_response(key, partial)
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# With greedy decoding the same (model, system prompt, user message) always produces the
+# same answer, so responses can be cached and identical in-flight requests can share one call.
+
+def cache_key(model_id, system_prompt, user_message):
+    # Collapse whitespace so trivially different copies of an FAQ message share an entry
+    normalized = [model_id, " ".join(system_prompt.split()), " ".join(user_message.split())]
+    return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+class LRUResponseCache:
+    """In-memory LRU cache with a TTL and a maximum number of entries"""
+
+    def __init__(self, ttl_seconds=3600, max_entries=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteResponseCache:
+    """SQLite-file cache that survives restarts and can be shared by several worker processes"""
+
+    def __init__(self, path="response_cache.sqlite3", ttl_seconds=3600, max_entries=10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl_seconds, now),
+            )
+            # Drop expired entries, then the least recently used ones beyond the size limit
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+def create_response_cache(backend, ttl_seconds, max_entries, path=None):
+    if backend == "memory":
+        return LRUResponseCache(ttl_seconds, max_entries)
+    if backend == "sqlite":
+        return SQLiteResponseCache(path, ttl_seconds, max_entries)
+    if backend is None:
+        return None
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+class SingleFlight:
+    """Coalesce concurrent identical calls (threads): one caller runs it, the others wait for its result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+class AsyncSingleFlight:
+    """Coalesce concurrent identical calls (asyncio): followers await the leader's future"""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, coro_fn):
+        future = self._calls.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await coro_fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
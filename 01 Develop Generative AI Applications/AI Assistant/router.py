@@ -0,0 +1,164 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+# 'auto' model selection for /generate.
+# Short inquiries go to the smaller models first, long ones to mistral-large. A model
+# whose rolling p95 latency breaks the SLO drops to the back of the list, and a call
+# that exceeds the per-attempt timeout (or is shed/fails) falls back to the next model.
+# Every decision and its outcome is appended to a JSONL log for tuning the thresholds.
+
+def estimate_prompt_tokens(text):
+    # Roughly 4 characters per token for English text; good enough to bucket prompts
+    return max(1, len(text) // 4)
+
+class LatencyWindow:
+    """The most recent call latencies of one model"""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self.samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def __len__(self):
+        return len(self.samples)
+
+class ModelRouter:
+    def __init__(self, short_order, long_order, short_prompt_tokens, slo_seconds,
+                 attempt_timeout, window_size=200, min_samples=10, log_path=None):
+        self.short_order = short_order
+        self.long_order = long_order
+        self.short_prompt_tokens = short_prompt_tokens
+        self.slo_seconds = slo_seconds
+        self.attempt_timeout = attempt_timeout
+        self.min_samples = min_samples
+        self.log_path = log_path
+        self.latencies = {name: LatencyWindow(window_size) for name in set(short_order) | set(long_order)}
+        self._log_lock = threading.Lock()
+        # Timed-out attempts keep running here so their latency is still observed
+        self._executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix='router')
+
+    def observe(self, model, seconds):
+        if model in self.latencies:
+            self.latencies[model].add(seconds)
+
+    def p95(self, model):
+        window = self.latencies[model]
+        return window.percentile(95) if len(window) >= self.min_samples else None
+
+    def plan(self, user_prompt):
+        """Ordered candidate models for a prompt, with the inputs that decided the order"""
+        prompt_tokens = estimate_prompt_tokens(user_prompt)
+        preferred = self.short_order if prompt_tokens <= self.short_prompt_tokens else self.long_order
+        p95s = {name: self.p95(name) for name in preferred}
+        # Models without enough samples are given the benefit of the doubt
+        within_slo = [name for name in preferred if p95s[name] is None or p95s[name] <= self.slo_seconds]
+        over_slo = sorted((name for name in preferred if name not in within_slo), key=lambda name: p95s[name])
+        return {
+            'prompt_tokens': prompt_tokens,
+            'bucket': 'short' if preferred is self.short_order else 'long',
+            'p95': p95s,
+            'candidates': within_slo + over_slo,
+            'attempts': [],
+        }
+
+    def route(self, user_prompt, call):
+        """Run call(model_name) on the planned models in turn; returns (model_name, result, decision)"""
+        decision = self.plan(user_prompt)
+        start_time = time.time()
+        try:
+            for name in decision['candidates']:
+                attempt_start = time.time()
+                future = self._executor.submit(call, name)
+                future.add_done_callback(self._observer(name, attempt_start))
+                try:
+                    result = future.result(timeout=self.attempt_timeout)
+                except FuturesTimeoutError:
+                    decision['attempts'].append({'model': name, 'outcome': 'timeout', 'seconds': time.time() - attempt_start})
+                    continue
+                except Exception as e:
+                    decision['attempts'].append({'model': name, 'outcome': 'error', 'error': str(e), 'seconds': time.time() - attempt_start})
+                    continue
+                decision['attempts'].append({'model': name, 'outcome': 'ok', 'seconds': time.time() - attempt_start})
+                decision['model'] = name
+                return name, result, decision
+            raise RuntimeError(f"All models failed or timed out: {', '.join(decision['candidates'])}")
+        finally:
+            decision['seconds'] = time.time() - start_time
+            self.record(decision)
+
+    async def aroute(self, user_prompt, acall):
+        """Async route(): acall(model_name) is a coroutine function"""
+        decision = self.plan(user_prompt)
+        start_time = time.time()
+        try:
+            for name in decision['candidates']:
+                attempt_start = time.time()
+                task = asyncio.ensure_future(acall(name))
+                task.add_done_callback(self._observer(name, attempt_start))
+                try:
+                    # shield() keeps a timed-out call running so its latency is still observed
+                    result = await asyncio.wait_for(asyncio.shield(task), self.attempt_timeout)
+                except asyncio.TimeoutError:
+                    decision['attempts'].append({'model': name, 'outcome': 'timeout', 'seconds': time.time() - attempt_start})
+                    continue
+                except Exception as e:
+                    decision['attempts'].append({'model': name, 'outcome': 'error', 'error': str(e), 'seconds': time.time() - attempt_start})
+                    continue
+                decision['attempts'].append({'model': name, 'outcome': 'ok', 'seconds': time.time() - attempt_start})
+                decision['model'] = name
+                return name, result, decision
+            raise RuntimeError(f"All models failed or timed out: {', '.join(decision['candidates'])}")
+        finally:
+            decision['seconds'] = time.time() - start_time
+            await self.arecord(decision)
+
+    def record_single(self, decision, name, outcome, seconds, error=None):
+        """Log a decision that got exactly one attempt (a stream cannot fall back once it has started)"""
+        self.record(self._single_attempt(decision, name, outcome, seconds, error))
+
+    async def arecord_single(self, decision, name, outcome, seconds, error=None):
+        """Async record_single()"""
+        await self.arecord(self._single_attempt(decision, name, outcome, seconds, error))
+
+    def _single_attempt(self, decision, name, outcome, seconds, error):
+        attempt = {'model': name, 'outcome': outcome, 'seconds': seconds}
+        if error is not None:
+            attempt['error'] = error
+        decision['attempts'].append(attempt)
+        decision['model'] = name
+        decision['seconds'] = seconds
+        return decision
+
+    def _observer(self, name, attempt_start):
+        def observe_done(future):
+            # Failed calls (shed, errors) say nothing about the model's latency
+            if not future.cancelled() and future.exception() is None:
+                self.observe(name, time.time() - attempt_start)
+        return observe_done
+
+    def record(self, decision):
+        if not self.log_path:
+            return
+        entry = {'time': time.time(), **decision}
+        with self._log_lock:
+            with open(self.log_path, 'a') as log_file:
+                log_file.write(json.dumps(entry) + "\n")
+
+    async def arecord(self, decision):
+        # The file write and its lock would otherwise block the event loop
+        if self.log_path:
+            await asyncio.to_thread(self.record, decision)
@@ -0,0 +1,232 @@
+import threading
+import time
+from collections import defaultdict
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Per-stage latency tracing for the prompt | model | parser chains in model.py.
+# Each request gets a RequestTrace; its callback handler times the three chain steps
+# (prompt templating, model call, JSON parsing), counts tokens and retries, and on
+# finish() folds everything into the process-wide METRICS registry served at /metrics.
+
+# Chain step tags added by RunnableSequence -> stage name
+STEP_STAGES = {
+    'seq:step:1': 'prompt',
+    'seq:step:2': 'model',
+    'seq:step:3': 'parse',
+}
+
+# Histogram buckets (seconds), fine-grained at the low end for templating/parsing
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _token_usage(response):
+    # ChatWatsonx reports usage on the message; older versions only in llm_output
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+            if usage:
+                return usage.get('input_tokens', 0), usage.get('output_tokens', 0)
+    usage = (response.llm_output or {}).get('token_usage') or {}
+    return (usage.get('prompt_tokens', usage.get('input_token_count', 0)),
+            usage.get('completion_tokens', usage.get('generated_token_count', 0)))
+
+class StageTimingHandler(BaseCallbackHandler):
+    """Callback handler that records when each chain step starts and ends"""
+
+    # Run in the calling thread/event loop so the timestamps are not skewed by an executor
+    run_inline = True
+
+    def __init__(self, trace):
+        self.trace = trace
+        self._starts = {}
+        self._stages = {}
+
+    def _start(self, run_id, tags):
+        stage = next((STEP_STAGES[tag] for tag in tags or () if tag in STEP_STAGES), None)
+        if stage is not None:
+            self._starts[run_id] = time.perf_counter()
+            self._stages[run_id] = stage
+
+    def _end(self, run_id):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.trace.add_stage(self._stages.pop(run_id), time.perf_counter() - start)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, tags=None, **kwargs):
+        self._start(run_id, tags)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, **kwargs):
+        self.trace.model_attempts += 1
+        self._start(run_id, tags)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, tags=None, **kwargs):
+        self.trace.model_attempts += 1
+        self._start(run_id, tags)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        # Streaming only: time to first token covers the network round-trip plus prompt processing
+        start = self._starts.get(run_id)
+        if start is not None and 'first_token' not in self.trace.stages:
+            self.trace.add_stage('first_token', time.perf_counter() - start)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens, output_tokens = _token_usage(response)
+        self.trace.input_tokens += input_tokens
+        self.trace.output_tokens += output_tokens
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        self.trace.retries += 1
+
+class RequestTrace:
+    """Timings, token counts and retries for one request to one model"""
+
+    def __init__(self, model_id=None):
+        self.model_id = model_id
+        self.stages = {}
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.model_attempts = 0
+        self.retries = 0
+        self.status = None
+        self._start = time.perf_counter()
+        self._end = None
+
+    def config(self):
+        return {'callbacks': [StageTimingHandler(self)]}
+
+    def add_stage(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def time_stage(self, stage):
+        return _StageTimer(self, stage)
+
+    def finish(self, status='ok'):
+        # Idempotent: the first caller records the request
+        if self._end is not None:
+            return
+        self._end = time.perf_counter()
+        self.status = status
+        METRICS.record(self)
+
+    @property
+    def total(self):
+        return (self._end or time.perf_counter()) - self._start
+
+    def timings(self):
+        stages = {stage: round(seconds, 6) for stage, seconds in self.stages.items()}
+        # Whatever the chain steps don't explain: queueing, callback and framework overhead.
+        # When streaming, the parser runs concurrently with the model, so this clamps at zero.
+        timed = sum(seconds for stage, seconds in self.stages.items() if stage != 'first_token')
+        return {
+            'stages': stages,
+            'overhead': round(max(self.total - timed, 0.0), 6),
+            'total': round(self.total, 6),
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'retries': self.retries + max(self.model_attempts - 1, 0),
+        }
+
+class _StageTimer:
+    def __init__(self, trace, stage):
+        self.trace = trace
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.add_stage(self.stage, time.perf_counter() - self._start)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds = defaultdict(Histogram)
+        self.request_seconds = defaultdict(Histogram)
+        self.requests = defaultdict(int)
+        self.tokens = defaultdict(int)
+        self.retries = defaultdict(int)
+        self.shed = defaultdict(int)
+
+    def record(self, trace):
+        model = trace.model_id or 'unknown'
+        timings = trace.timings()
+        with self._lock:
+            self.requests[(model, trace.status)] += 1
+            self.request_seconds[(model,)].observe(timings['total'])
+            for stage, seconds in timings['stages'].items():
+                self.stage_seconds[(model, stage)].observe(seconds)
+            self.stage_seconds[(model, 'overhead')].observe(timings['overhead'])
+            self.tokens[(model, 'input')] += trace.input_tokens
+            self.tokens[(model, 'output')] += trace.output_tokens
+            self.retries[(model,)] += timings['retries']
+
+    def record_shed(self, model, reason):
+        with self._lock:
+            self.shed[(model, reason)] += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            self._render_histograms(lines, 'ai_assistant_request_seconds', 'End-to-end model call latency',
+                                    ('model',), self.request_seconds)
+            self._render_histograms(lines, 'ai_assistant_stage_seconds', 'Latency per chain stage',
+                                    ('model', 'stage'), self.stage_seconds)
+            self._render_counters(lines, 'ai_assistant_requests_total', 'Model calls by outcome',
+                                  ('model', 'status'), self.requests)
+            self._render_counters(lines, 'ai_assistant_tokens_total', 'Prompt and generated tokens',
+                                  ('model', 'direction'), self.tokens)
+            self._render_counters(lines, 'ai_assistant_retries_total', 'Model call retries',
+                                  ('model',), self.retries)
+            self._render_counters(lines, 'ai_assistant_shed_total', 'Requests rejected by admission control',
+                                  ('model', 'reason'), self.shed)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(names, values, **extra):
+        pairs = list(zip(names, values)) + list(extra.items())
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+    def _render_histograms(self, lines, name, help_text, label_names, histograms):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for values, histogram in sorted(histograms.items()):
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f"{name}_bucket{self._labels(label_names, values, le=bound)} {count}")
+            lines.append(f"{name}_bucket{self._labels(label_names, values, le='+Inf')} {histogram.count}")
+            lines.append(f"{name}_sum{self._labels(label_names, values)} {histogram.sum}")
+            lines.append(f"{name}_count{self._labels(label_names, values)} {histogram.count}")
+
+    def _render_counters(self, lines, name, help_text, label_names, counters):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for values, count in sorted(counters.items()):
+            lines.append(f"{name}{self._labels(label_names, values)} {count}")
+
+METRICS = MetricsRegistry()
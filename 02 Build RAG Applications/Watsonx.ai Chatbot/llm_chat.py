@@ -26,20 +26,54 @@ watsonx_llm = WatsonxLLM(
     params=parameters,
 )
 
+# Gradio queue settings: how many requests stream from watsonx at once, and how many may wait
+CONCURRENCY_LIMIT = 16
+QUEUE_MAX_SIZE = 64
+
+# Chat mode keeps this many previous exchanges in the prompt
+MAX_HISTORY_TURNS = 5
+
 # Function to generate a response from the model
+# Streams the answer: each yield replaces the output box with the text generated so far
 def generate_response(prompt_txt):
-    generated_response = watsonx_llm.invoke(prompt_txt)
-    return generated_response
+    generated_response = ""
+    for chunk in watsonx_llm.stream(prompt_txt):
+        generated_response += chunk
+        yield generated_response
+
+# Chat mode: Gradio keeps the history per browser session and passes it in on every turn
+def build_chat_prompt(message, history):
+    prompt = ""
+    for user_turn, assistant_turn in history[-MAX_HISTORY_TURNS:]:
+        prompt += f"<s>[INST] {user_turn} [/INST] {assistant_turn}</s>"
+    return prompt + f"[INST] {message} [/INST]"
+
+def chat_response(message, history):
+    yield from generate_response(build_chat_prompt(message, history))
 
 # Create Gradio interface
-chat_application = gr.Interface(
+single_question = gr.Interface(
     fn=generate_response,
     allow_flagging="never",
     inputs=gr.Textbox(label="Input", lines=2, placeholder="Type your question here..."),
     outputs=gr.Textbox(label="Output"),
     title="Watsonx.ai Chatbot",
-    description="Ask any question and the chatbot will try to answer."
+    description="Ask any question and the chatbot will try to answer.",
+    concurrency_limit=CONCURRENCY_LIMIT,
 )
 
+chat = gr.ChatInterface(
+    fn=chat_response,
+    title="Watsonx.ai Chatbot",
+    description="Chat with the model; it remembers the last few exchanges of this session.",
+    concurrency_limit=CONCURRENCY_LIMIT,
+)
+
+chat_application = gr.TabbedInterface([single_question, chat], ["Single question", "Chat"])
+
+# Queue requests so streaming answers for different users are generated concurrently;
+# beyond QUEUE_MAX_SIZE waiting requests new users are turned away instead of piling up
+chat_application.queue(max_size=QUEUE_MAX_SIZE, default_concurrency_limit=CONCURRENCY_LIMIT)
+
 # Launch the app
 chat_application.launch(server_name="127.0.0.1", server_port= 7860)
\ No newline at end of file
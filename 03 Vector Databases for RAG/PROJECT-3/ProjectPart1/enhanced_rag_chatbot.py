@@ -1,7 +1,5 @@
 from shared_functions import *
 from typing import List, Dict, Any
-from ibm_watsonx_ai.foundation_models.utils.enums import ModelTypes
-from ibm_watsonx_ai.foundation_models import ModelInference
 import json
 
 # Global variables
@@ -18,15 +16,23 @@ project_id = "skills-network"  # <--- NOTE: specify "skills-network" as your pro
 space_id = None
 verify = False
 
-# Initialize the LLM model
-model = ModelInference(
-    model_id=model_id,
-    credentials=my_credentials,
-    params=gen_parms,
-    project_id=project_id,
-    space_id=space_id,
-    verify=verify,
-)
+# The LLM model is created on first use so importing this module stays fast
+_model = None
+
+def get_model():
+    """Return the shared watsonx.ai model, creating it on first use"""
+    global _model
+    if _model is None:
+        from ibm_watsonx_ai.foundation_models import ModelInference
+        _model = ModelInference(
+            model_id=model_id,
+            credentials=my_credentials,
+            params=gen_parms,
+            project_id=project_id,
+            space_id=space_id,
+            verify=verify,
+        )
+    return _model
 
 def main():
     """Main function for enhanced RAG chatbot system"""
@@ -50,7 +56,7 @@ def main():
         
         # Test LLM connection
         print("🔗 Testing LLM connection...")
-        test_response = model.generate(prompt="Hello", params=None)
+        test_response = get_model().generate(prompt="Hello", params=None)
         if test_response and "results" in test_response:
             print("✅ LLM connection established")
         else:
@@ -127,7 +133,7 @@ Please provide a helpful, short response that:
 Response:'''
 
         # Generate response using IBM Granite
-        generated_response = model.generate(prompt=prompt, params=None)
+        generated_response = get_model().generate(prompt=prompt, params=None)
         
         # Extract the generated text
         if generated_response and "results" in generated_response:
@@ -309,7 +315,7 @@ Please provide a short comparison that:
 
 Comparison:'''
 
-        generated_response = model.generate(prompt=comparison_prompt, params=None)
+        generated_response = get_model().generate(prompt=comparison_prompt, params=None)
         
         if generated_response and "results" in generated_response:
             return generated_response["results"][0]["generated_text"].strip()
@@ -1,12 +1,36 @@
-import chromadb
-from chromadb.utils import embedding_functions
 import json
 import re
-import numpy as np
 from typing import List, Dict, Any, Optional
 
-# Initialize ChromaDB client
-client = chromadb.Client()
+# chromadb and sentence-transformers (which pulls in torch) take seconds to import,
+# so they are loaded on first use rather than when this module is imported.
+# This keeps help screens and other short-lived invocations fast.
+_client = None
+_embedding_function = None
+
+def get_client():
+    """Return the shared ChromaDB client, creating it on first use"""
+    global _client
+    if _client is None:
+        import chromadb
+        _client = chromadb.Client()
+    return _client
+
+def get_embedding_function():
+    """Return the shared sentence transformer embedding function, loading the model on first use"""
+    global _embedding_function
+    if _embedding_function is None:
+        from chromadb.utils import embedding_functions
+        _embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name="all-MiniLM-L6-v2"
+        )
+    return _embedding_function
+
+def __getattr__(name):
+    # Keep `shared_functions.client` working for existing callers
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def load_food_data(file_path: str) -> List[Dict]:
     """Load food data from JSON file"""
@@ -51,16 +75,15 @@ def load_food_data(file_path: str) -> List[Dict]:
 
 def create_similarity_search_collection(collection_name: str, collection_metadata: dict = None):
     """Create ChromaDB collection with sentence transformer embeddings"""
+    client = get_client()
     try:
         # Try to delete existing collection to start fresh
         client.delete_collection(collection_name)
     except:
         pass
     
-    # Create embedding function
-    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
+    # Reuse the embedding function so the model is loaded only once per process
+    sentence_transformer_ef = get_embedding_function()
     
     # Create new collection
     return client.create_collection(
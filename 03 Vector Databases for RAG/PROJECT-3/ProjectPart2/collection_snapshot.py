@@ -0,0 +1,466 @@
+"""
+Snapshot/restore of built vector collections as a single memory-mappable artifact.
+
+An exported snapshot holds everything a search server needs, so it can start
+query-ready without re-embedding the dataset:
+    - a JSON manifest (format version, model, id table, documents, metadata columns)
+    - a float32 vectors array (L2-normalized, so cosine similarity is a dot product)
+    - a prebuilt k-nearest-neighbour graph (int32 adjacency lists)
+
+Snapshots are opened read-only with mmap, so several worker processes that open
+the same file share its pages instead of each holding a private copy.
+
+SnapshotCollection.query() mirrors ChromaDB's collection.query(), so the search
+helpers in shared_functions work on a snapshot unchanged:
+
+    collection = SnapshotCollection.open('food_collection.snap')
+    results = perform_filtered_similarity_search(collection, "spicy curry", max_calories=400)
+
+Usage:
+    python3.11 collection_snapshot.py export --data FoodDataSet.json --out food_collection.snap
+    python3.11 collection_snapshot.py info food_collection.snap --recall-sample 200
+    python3.11 collection_snapshot.py query food_collection.snap "chocolate dessert" --ef 128
+
+Large snapshots are searched through the graph, which is approximate. The beam width
+(ef) trades speed for recall: pass search_ef to open() or ef to query(), and use
+`info` to measure the recall of the graph against exact search.
+"""
+import argparse
+import heapq
+import json
+import mmap
+import os
+import struct
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"VECSNAP\0"
+SNAPSHOT_VERSION = 1
+# magic, format version, manifest length
+HEADER_FORMAT = "<8sIQ"
+SECTION_ALIGNMENT = 64
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+# Collections up to this size are searched exactly; larger ones walk the graph
+EXACT_SEARCH_LIMIT = 20000
+# Graph search beam width when none is given: max(4 * n_results, MIN_SEARCH_EF)
+MIN_SEARCH_EF = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def build_knn_graph(vectors: np.ndarray, degree: int = 16, block_size: int = 1024) -> np.ndarray:
+    """Build a k-nearest-neighbour graph over normalized vectors"""
+    count = len(vectors)
+    degree = max(1, min(degree, count - 1))
+    graph = np.zeros((count, degree), dtype=np.int32)
+
+    for start in range(0, count, block_size):
+        end = min(start + block_size, count)
+        similarities = vectors[start:end] @ vectors.T
+        # Exclude each node from its own neighbour list
+        similarities[np.arange(end - start), np.arange(start, end)] = -np.inf
+        neighbours = np.argpartition(-similarities, degree - 1, axis=1)[:, :degree]
+        # Order each neighbour list best-first
+        order = np.argsort(-np.take_along_axis(similarities, neighbours, axis=1), axis=1)
+        graph[start:end] = np.take_along_axis(neighbours, order, axis=1)
+
+    return graph
+
+
+def write_snapshot(path: str, ids: List[str], embeddings, documents: Optional[List[str]] = None,
+                   metadatas: Optional[List[Dict]] = None, collection_name: str = "",
+                   model_name: str = DEFAULT_MODEL, graph_degree: int = 16) -> Dict[str, Any]:
+    """Write vectors, ids, documents, metadata columns and a kNN graph to one artifact"""
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+    count, dim = vectors.shape if vectors.size else (0, 0)
+    graph = build_knn_graph(vectors, graph_degree) if count > 1 else np.zeros((count, 0), dtype=np.int32)
+
+    # Store metadata column-wise; missing keys become None
+    metadatas = metadatas or [{} for _ in ids]
+    columns = sorted({key for metadata in metadatas for key in (metadata or {})})
+    metadata_columns = {
+        column: [(metadata or {}).get(column) for metadata in metadatas]
+        for column in columns
+    }
+
+    # Entry points for graph search: the nodes closest to the dataset centroid
+    entry_points = []
+    if count:
+        centroid = vectors.mean(axis=0)
+        entry_points = np.argsort(-(vectors @ centroid))[:8].tolist()
+
+    manifest = {
+        "format_version": SNAPSHOT_VERSION,
+        "collection": collection_name,
+        "model": model_name,
+        "space": "cosine",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "count": int(count),
+        "dim": int(dim),
+        "graph_degree": int(graph.shape[1]),
+        "entry_points": entry_points,
+        "ids": list(ids),
+        "documents": list(documents) if documents is not None else None,
+        "metadata_columns": metadata_columns,
+        "sections": {},
+    }
+
+    # Section offsets depend on the manifest length, which depends on the offsets;
+    # reserve a fixed-width placeholder and settle them in two passes
+    for _ in range(2):
+        manifest_bytes = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+        offset = _align(struct.calcsize(HEADER_FORMAT) + len(manifest_bytes) + 64)
+        sections = {}
+        for name, array in (("vectors", vectors), ("graph", graph)):
+            sections[name] = {
+                "offset": offset,
+                "nbytes": int(array.nbytes),
+                "dtype": str(array.dtype),
+                "shape": list(array.shape),
+            }
+            offset = _align(offset + array.nbytes)
+        manifest["sections"] = sections
+
+    manifest_bytes = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+
+    # Write to a temporary file and rename, so readers never see a partial snapshot
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(struct.pack(HEADER_FORMAT, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(manifest_bytes)))
+        file.write(manifest_bytes)
+        for name, array in (("vectors", vectors), ("graph", graph)):
+            file.seek(manifest["sections"][name]["offset"])
+            file.write(np.ascontiguousarray(array).tobytes())
+        file.truncate(max(file.tell(), offset))
+    os.replace(tmp_path, path)
+
+    return manifest
+
+
+def export_collection(collection, path: str, model_name: str = DEFAULT_MODEL,
+                      graph_degree: int = 16) -> Dict[str, Any]:
+    """Export a populated ChromaDB collection to a snapshot file"""
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    return write_snapshot(
+        path,
+        ids=data["ids"],
+        embeddings=data["embeddings"],
+        documents=data["documents"],
+        metadatas=data["metadatas"],
+        collection_name=collection.name,
+        model_name=model_name,
+        graph_degree=graph_degree,
+    )
+
+
+def _match_condition(column: np.ndarray, condition) -> np.ndarray:
+    """Evaluate one ChromaDB-style field condition over a metadata column"""
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+
+    mask = np.ones(len(column), dtype=bool)
+    for operator, value in condition.items():
+        if operator == "$eq":
+            matches = [item == value for item in column]
+        elif operator == "$ne":
+            matches = [item != value for item in column]
+        elif operator == "$in":
+            matches = [item in value for item in column]
+        elif operator == "$nin":
+            matches = [item not in value for item in column]
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            compare = {
+                "$gt": lambda a, b: a > b,
+                "$gte": lambda a, b: a >= b,
+                "$lt": lambda a, b: a < b,
+                "$lte": lambda a, b: a <= b,
+            }[operator]
+            matches = [
+                item is not None and not isinstance(item, str) and compare(item, value)
+                for item in column
+            ]
+        else:
+            raise ValueError(f"Unsupported where operator: {operator}")
+        mask &= np.array(matches, dtype=bool)
+    return mask
+
+
+class SnapshotCollection:
+    """Read-only, memory-mapped collection restored from a snapshot file"""
+
+    def __init__(self, path: str, embedding_function=None, search_ef: Optional[int] = None):
+        self.path = path
+        self.search_ef = search_ef
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, manifest_length = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a collection snapshot")
+        if version > SNAPSHOT_VERSION:
+            raise ValueError(f"Snapshot format version {version} is newer than supported ({SNAPSHOT_VERSION})")
+
+        header_size = struct.calcsize(HEADER_FORMAT)
+        self.manifest = json.loads(self._mmap[header_size:header_size + manifest_length])
+        self.name = self.manifest["collection"]
+        self.ids = self.manifest["ids"]
+        self.documents = self.manifest["documents"]
+        self.metadata_columns = {
+            column: np.array(values, dtype=object)
+            for column, values in self.manifest["metadata_columns"].items()
+        }
+
+        # Zero-copy views onto the mapped file
+        self.vectors = self._section("vectors")
+        self.graph = self._section("graph")
+        self._embedding_function = embedding_function
+
+    @classmethod
+    def open(cls, path: str, embedding_function=None, search_ef: Optional[int] = None) -> "SnapshotCollection":
+        return cls(path, embedding_function, search_ef)
+
+    def _section(self, name: str) -> np.ndarray:
+        section = self.manifest["sections"][name]
+        count = int(np.prod(section["shape"])) if section["shape"] else 0
+        array = np.frombuffer(self._mmap, dtype=section["dtype"], count=count, offset=section["offset"])
+        return array.reshape(section["shape"])
+
+    def count(self) -> int:
+        return self.manifest["count"]
+
+    def close(self) -> None:
+        # Drop the array views before unmapping the file they point into
+        self.vectors = self.graph = None
+        self._mmap.close()
+        self._file.close()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        if self._embedding_function is None:
+            if self.manifest["model"] == DEFAULT_MODEL:
+                from shared_functions import get_embedding_function
+                self._embedding_function = get_embedding_function()
+            else:
+                from chromadb.utils import embedding_functions
+                self._embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+                    model_name=self.manifest["model"]
+                )
+        return _normalize(np.asarray(self._embedding_function(texts), dtype=np.float32))
+
+    def _metadata(self, index: int) -> Dict[str, Any]:
+        return {
+            column: values[index]
+            for column, values in self.metadata_columns.items()
+            if values[index] is not None
+        }
+
+    def _where_mask(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        if "$and" in where:
+            mask = np.ones(self.count(), dtype=bool)
+            for clause in where["$and"]:
+                mask &= self._where_mask(clause)
+            return mask
+        if "$or" in where:
+            mask = np.zeros(self.count(), dtype=bool)
+            for clause in where["$or"]:
+                mask |= self._where_mask(clause)
+            return mask
+
+        mask = np.ones(self.count(), dtype=bool)
+        for field, condition in where.items():
+            column = self.metadata_columns.get(field)
+            if column is None:
+                return np.zeros(self.count(), dtype=bool)
+            mask &= _match_condition(column, condition)
+        return mask
+
+    def _exact_search(self, query: np.ndarray, n_results: int, mask: Optional[np.ndarray]):
+        candidates = np.flatnonzero(mask) if mask is not None else None
+        vectors = self.vectors[candidates] if candidates is not None else self.vectors
+        if len(vectors) == 0:
+            return [], []
+
+        similarities = vectors @ query
+        n_results = min(n_results, len(similarities))
+        top = np.argpartition(-similarities, n_results - 1)[:n_results]
+        top = top[np.argsort(-similarities[top])]
+        indices = candidates[top] if candidates is not None else top
+        return indices.tolist(), similarities[top].tolist()
+
+    def _search_ef(self, n_results: int, ef: Optional[int]) -> int:
+        ef = ef or self.search_ef or max(4 * n_results, MIN_SEARCH_EF)
+        # The beam must hold at least the requested results
+        return max(ef, n_results)
+
+    def _graph_search(self, query: np.ndarray, n_results: int, ef: int):
+        """Best-first beam search over the prebuilt kNN graph"""
+        entry = self.manifest["entry_points"]
+        visited = set(entry)
+        entry_similarities = self.vectors[entry] @ query
+        candidates = [(-float(s), i) for s, i in zip(entry_similarities, entry)]
+        heapq.heapify(candidates)
+        best = [(float(s), i) for s, i in zip(entry_similarities, entry)]
+        heapq.heapify(best)
+
+        while candidates:
+            negative_similarity, node = heapq.heappop(candidates)
+            if len(best) >= ef and -negative_similarity < best[0][0]:
+                break
+            neighbours = [int(n) for n in self.graph[node] if int(n) not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+            for similarity, neighbour in zip((self.vectors[neighbours] @ query).tolist(), neighbours):
+                if len(best) < ef or similarity > best[0][0]:
+                    heapq.heappush(candidates, (-similarity, neighbour))
+                    heapq.heappush(best, (similarity, neighbour))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+
+        top = heapq.nlargest(n_results, best)
+        return [i for _, i in top], [s for s, _ in top]
+
+    def query(self, query_texts: Optional[List[str]] = None, n_results: int = 10,
+              where: Optional[Dict] = None, query_embeddings=None, include=None,
+              ef: Optional[int] = None) -> Dict[str, List]:
+        """ChromaDB-compatible query returning ids, distances, metadatas and documents
+
+        ef overrides the graph search beam width for this call (see search_ef).
+        """
+        if query_embeddings is None:
+            queries = self._embed(query_texts)
+        else:
+            queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+
+        mask = self._where_mask(where)
+        use_graph = mask is None and self.count() > EXACT_SEARCH_LIMIT and self.graph.shape[1] > 0
+
+        results = {"ids": [], "distances": [], "metadatas": [], "documents": []}
+        for query in queries:
+            if use_graph:
+                indices, similarities = self._graph_search(query, n_results, self._search_ef(n_results, ef))
+            else:
+                indices, similarities = self._exact_search(query, n_results, mask)
+
+            results["ids"].append([self.ids[i] for i in indices])
+            # Cosine distance, matching an hnsw "space": "cosine" collection
+            results["distances"].append([1.0 - s for s in similarities])
+            results["metadatas"].append([self._metadata(i) for i in indices])
+            results["documents"].append(
+                [self.documents[i] for i in indices] if self.documents is not None else None
+            )
+        return results
+
+    def estimate_recall(self, n_results: int = 10, sample: int = 100, ef: Optional[int] = None,
+                        seed: int = 0) -> Optional[float]:
+        """Recall@n_results of the graph search against exact search, using stored vectors as queries"""
+        if self.count() == 0 or self.graph.shape[1] == 0:
+            return None
+        n_results = min(n_results, self.count())
+        rng = np.random.default_rng(seed)
+        queries = rng.choice(self.count(), size=min(sample, self.count()), replace=False)
+        ef = self._search_ef(n_results, ef)
+        found = 0
+        for index in queries:
+            query = self.vectors[index]
+            exact, _ = self._exact_search(query, n_results, None)
+            approximate, _ = self._graph_search(query, n_results, ef)
+            found += len(set(exact) & set(approximate))
+        return found / (len(queries) * n_results)
+
+
+def export_food_snapshot(data_path: str, out_path: str, graph_degree: int = 16) -> Dict[str, Any]:
+    """Build the food collection once and export it as a snapshot"""
+    from shared_functions import load_food_data, create_similarity_search_collection, populate_similarity_collection
+
+    food_items = load_food_data(data_path)
+    collection = create_similarity_search_collection(
+        "food_snapshot_export",
+        {'description': 'Temporary collection used to export a snapshot'}
+    )
+    populate_similarity_collection(collection, food_items)
+    return export_collection(collection, out_path, graph_degree=graph_degree)
+
+
+def show_snapshot_info(path: str, search_ef: Optional[int] = None, recall_sample: int = 100,
+                       n_results: int = 10) -> None:
+    """Print the manifest summary of a snapshot and the recall of its graph search"""
+    start_time = time.time()
+    collection = SnapshotCollection.open(path, search_ef=search_ef)
+    open_time = time.time() - start_time
+    manifest = collection.manifest
+
+    print(f"📦 Snapshot: {path}")
+    print(f"   Format version: {manifest['format_version']}")
+    print(f"   Collection: {manifest['collection']}")
+    print(f"   Model: {manifest['model']} ({manifest['space']})")
+    print(f"   Vectors: {manifest['count']} x {manifest['dim']}")
+    print(f"   Graph degree: {manifest['graph_degree']}")
+    print(f"   Metadata columns: {', '.join(manifest['metadata_columns'])}")
+    print(f"   Created: {manifest['created_at']}")
+    print(f"   File size: {os.path.getsize(path) / 1024:.1f} KiB")
+    print(f"⏱️ Open time: {open_time * 1000:.1f} ms")
+
+    if recall_sample > 0:
+        start_time = time.time()
+        recall = collection.estimate_recall(n_results, recall_sample)
+        if recall is None:
+            print("🎯 Graph search: no graph in this snapshot, queries are exact")
+        else:
+            ef = collection._search_ef(n_results, None)
+            used = "used" if collection.count() > EXACT_SEARCH_LIMIT else f"unused up to {EXACT_SEARCH_LIMIT} vectors"
+            print(f"🎯 Graph recall@{n_results} (ef={ef}): {recall:.3f} over {min(recall_sample, collection.count())} "
+                  f"sample queries in {time.time() - start_time:.2f}s ({used})")
+    collection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and inspect collection snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Build the food collection and export it")
+    export_parser.add_argument("--data", default="./FoodDataSet.json")
+    export_parser.add_argument("--out", default="./food_collection.snap")
+    export_parser.add_argument("--degree", type=int, default=16, help="Neighbours per node in the graph")
+
+    info_parser = subparsers.add_parser("info", help="Show snapshot manifest details")
+    info_parser.add_argument("path")
+    info_parser.add_argument("--ef", type=int, default=None, help="Graph search beam width to measure")
+    info_parser.add_argument("--recall-sample", type=int, default=100,
+                             help="Sample queries for the recall estimate (0 to skip)")
+
+    query_parser = subparsers.add_parser("query", help="Query a snapshot")
+    query_parser.add_argument("path")
+    query_parser.add_argument("text")
+    query_parser.add_argument("-n", "--n-results", type=int, default=5)
+    query_parser.add_argument("--ef", type=int, default=None, help="Graph search beam width")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        manifest = export_food_snapshot(args.data, args.out, args.degree)
+        print(f"✅ Exported {manifest['count']} vectors to {args.out}")
+    elif args.command == "info":
+        show_snapshot_info(args.path, args.ef, args.recall_sample)
+    elif args.command == "query":
+        from shared_functions import perform_similarity_search
+
+        collection = SnapshotCollection.open(args.path, search_ef=args.ef)
+        for i, result in enumerate(perform_similarity_search(collection, args.text, args.n_results), 1):
+            print(f"{i}. {result['food_name']} ({result['similarity_score'] * 100:.1f}% match)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+ONNX Runtime (int8 quantized) CPU embedding function for all-MiniLM-L6-v2.
+
+OnnxMiniLMEmbeddingFunction has the same call interface as ChromaDB's
+SentenceTransformerEmbeddingFunction (a list of texts in, one vector per text out)
+but runs an exported, dynamically quantized ONNX model instead of PyTorch, which
+raises embedding throughput per CPU core for both ingestion and queries.
+
+Export the model once (needs torch + transformers), then only onnxruntime and
+tokenizers are required at run time:
+
+    python3.11 onnx_embedding.py export --out ./onnx-all-MiniLM-L6-v2
+    python3.11 onnx_embedding.py parity --model-dir ./onnx-all-MiniLM-L6-v2
+
+To use it in every PROJECT-3 tool, select it through shared_functions:
+
+    EMBEDDING_BACKEND=onnx ONNX_MODEL_DIR=./onnx-all-MiniLM-L6-v2 python3.11 interactive_search.py
+"""
+import argparse
+import os
+import time
+from typing import List
+
+import numpy as np
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def export_onnx_model(output_dir: str, model_name: str = DEFAULT_MODEL, quantize: bool = True) -> str:
+    """Export the transformer to ONNX, optionally add a dynamic int8 copy, and return the model path"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    class TransformerOutput(torch.nn.Module):
+        """Bind inputs by keyword so export does not depend on forward()'s argument order"""
+
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.transformer(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            ).last_hidden_state
+
+    # Export the bare transformer; mean pooling and normalization run in numpy
+    sample = tokenizer(["An example sentence"], return_tensors="pt")
+    fp32_path = os.path.join(output_dir, FP32_MODEL_FILE)
+    torch.onnx.export(
+        TransformerOutput(model),
+        (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "token_type_ids": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=17,
+        dynamo=False,
+    )
+    tokenizer.save_pretrained(output_dir)
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = os.path.join(output_dir, INT8_MODEL_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxMiniLMEmbeddingFunction:
+    """Drop-in replacement for SentenceTransformerEmbeddingFunction backed by ONNX Runtime"""
+
+    def __init__(self, model_dir: str, num_threads: int = None, quantized: bool = True,
+                 max_length: int = 256, batch_size: int = 32):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir
+        self.quantized = quantized
+        self.batch_size = batch_size
+        self.num_threads = num_threads or int(os.environ.get("EMBEDDING_NUM_THREADS", "0")) or None
+
+        model_path = os.path.join(model_dir, INT8_MODEL_FILE if quantized else FP32_MODEL_FILE)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+        self._session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+    @staticmethod
+    def name() -> str:
+        return "onnx_minilm"
+
+    def get_config(self) -> dict:
+        return {
+            "model_dir": self.model_dir,
+            "num_threads": self.num_threads,
+            "quantized": self.quantized,
+            "batch_size": self.batch_size,
+        }
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        inputs = {name: value for name, value in inputs.items() if name in self._input_names}
+        token_embeddings = self._session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then L2 normalization (as sentence-transformers does)
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        embeddings = []
+        for start in range(0, len(input), self.batch_size):
+            embeddings.extend(self._embed_batch(list(input[start:start + self.batch_size])))
+        return embeddings
+
+
+def check_parity(model_dir: str, texts: List[str], min_cosine: float = 0.98,
+                 num_threads: int = None, quantized: bool = True) -> bool:
+    """Compare ONNX embeddings with the PyTorch sentence-transformers output"""
+    # The same model SentenceTransformerEmbeddingFunction wraps
+    from sentence_transformers import SentenceTransformer
+
+    torch_model = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
+    onnx_ef = OnnxMiniLMEmbeddingFunction(model_dir, num_threads=num_threads, quantized=quantized)
+    label = "ONNX int8" if quantized else "ONNX fp32"
+
+    start_time = time.time()
+    torch_vectors = np.asarray(torch_model.encode(texts), dtype=np.float32)
+    torch_time = time.time() - start_time
+
+    start_time = time.time()
+    onnx_vectors = np.asarray(onnx_ef(texts), dtype=np.float32)
+    onnx_time = time.time() - start_time
+
+    torch_vectors /= np.linalg.norm(torch_vectors, axis=1, keepdims=True)
+    cosines = (torch_vectors * onnx_vectors).sum(axis=1)
+
+    print(f"🔬 {label} vs PyTorch EMBEDDING PARITY")
+    print("=" * 45)
+    print(f"Texts: {len(texts)}")
+    print(f"Cosine similarity: min {cosines.min():.4f}, mean {cosines.mean():.4f}")
+    print(f"Max cosine drift: {1 - cosines.min():.4f} (allowed {1 - min_cosine:.4f})")
+    print(f"⏱️ PyTorch: {len(texts) / torch_time:.1f} texts/s")
+    print(f"⏱️ {label}: {len(texts) / onnx_time:.1f} texts/s")
+
+    passed = bool(cosines.min() >= min_cosine)
+    print("✅ Parity check passed" if passed else "❌ Parity check failed")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX Runtime embedding function for all-MiniLM-L6-v2")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export and quantize the model")
+    export_parser.add_argument("--out", default="./onnx-all-MiniLM-L6-v2")
+    export_parser.add_argument("--no-quantize", action="store_true")
+
+    parity_parser = subparsers.add_parser("parity", help="Check cosine drift against PyTorch")
+    parity_parser.add_argument("--model-dir", default="./onnx-all-MiniLM-L6-v2")
+    parity_parser.add_argument("--data", default="./FoodDataSet.json")
+    parity_parser.add_argument("--min-cosine", type=float, default=0.98)
+    parity_parser.add_argument("--threads", type=int, default=None)
+    parity_parser.add_argument("--no-quantize", action="store_true", help="Check the fp32 model instead of int8")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        model_path = export_onnx_model(args.out, quantize=not args.no_quantize)
+        print(f"✅ Exported {model_path}")
+    elif args.command == "parity":
+        from shared_functions import load_food_data
+
+        texts = [
+            f"Name: {food['food_name']}. Description: {food.get('food_description', '')}"
+            for food in load_food_data(args.data)
+        ]
+        if not check_parity(args.model_dir, texts, args.min_cosine, args.threads,
+                            quantized=not args.no_quantize):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Sharded vector search across local worker processes.
+
+Food items are partitioned by a stable hash of their food_id across N worker
+processes. Each worker owns its own ChromaDB collection holding only its shard.
+Searches are fanned out to every shard in parallel and the per-shard top-k
+results are merged with a heap, so the answer matches a single-collection search
+while no single process has to hold the whole catalog.
+
+Everything runs locally with multiprocessing; no external cluster is needed.
+
+Usage:
+    python3.11 sharded_search.py --shards 4 "chocolate dessert"
+"""
+import argparse
+import heapq
+import itertools
+import multiprocessing
+import os
+import time
+import zlib
+from multiprocessing.connection import wait
+from typing import List, Dict, Any, Optional
+
+
+def shard_for(food_id, num_shards: int) -> int:
+    """Stable shard assignment (Python's hash() is salted per process, crc32 is not)"""
+    return zlib.crc32(str(food_id).encode("utf-8")) % num_shards
+
+
+def partition_food_items(food_items: List[Dict], num_shards: int) -> List[List[Dict]]:
+    """Split food items into num_shards lists by hashed food_id"""
+    shards = [[] for _ in range(num_shards)]
+    for i, food in enumerate(food_items):
+        shards[shard_for(food.get("food_id", i), num_shards)].append(food)
+    return shards
+
+
+def _shard_worker(shard_id: int, food_items: List[Dict], connection) -> None:
+    """Worker process: build the shard's collection, then serve search requests"""
+    from shared_functions import (
+        create_similarity_search_collection,
+        populate_similarity_collection,
+        perform_similarity_search,
+        perform_filtered_similarity_search,
+    )
+
+    collection = create_similarity_search_collection(
+        f"food_shard_{shard_id}",
+        {'description': f'Shard {shard_id} of the sharded food catalog'}
+    )
+    if food_items:
+        populate_similarity_collection(collection, food_items)
+    connection.send(("ready", {"items": collection.count()}))
+
+    operations = {
+        "search": lambda kwargs: perform_similarity_search(collection, **kwargs),
+        "filtered_search": lambda kwargs: perform_filtered_similarity_search(collection, **kwargs),
+        "health": lambda kwargs: {"items": collection.count()},
+    }
+
+    while True:
+        try:
+            operation, request_id, kwargs = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if operation == "stop":
+            break
+
+        start_time = time.time()
+        try:
+            result = operations[operation](kwargs)
+            connection.send((request_id, "ok", result, time.time() - start_time))
+        except Exception as e:
+            connection.send((request_id, "error", str(e), time.time() - start_time))
+
+
+class ShardedFoodSearch:
+    """Fan-out similarity search over food items partitioned across worker processes"""
+
+    def __init__(self, food_items: List[Dict], num_shards: Optional[int] = None,
+                 timeout: float = 30.0, startup_timeout: float = 300.0):
+        self.num_shards = num_shards or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self._partitions = partition_food_items(food_items, self.num_shards)
+        self._request_ids = itertools.count(1)
+        self._shards = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self) -> None:
+        """Start one worker per shard and wait until every shard is populated"""
+        # spawn avoids forking a parent that may already hold torch/chromadb threads
+        context = multiprocessing.get_context("spawn")
+        for shard_id, items in enumerate(self._partitions):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker,
+                args=(shard_id, items, child_conn),
+                name=f"food-shard-{shard_id}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._shards.append({
+                "shard_id": shard_id,
+                "process": process,
+                "connection": parent_conn,
+                "items": 0,
+                "ready": False,
+                "requests": 0,
+                "errors": 0,
+                "timeouts": 0,
+                "last_latency": None,
+                "last_error": None,
+            })
+
+        deadline = time.time() + self.startup_timeout
+        pending = {shard["connection"]: shard for shard in self._shards}
+        while pending and time.time() < deadline:
+            for connection in wait(list(pending), timeout=deadline - time.time()):
+                shard = pending.pop(connection)
+                try:
+                    _, info = connection.recv()
+                    shard["items"] = info["items"]
+                    shard["ready"] = True
+                except EOFError:
+                    shard["last_error"] = "worker exited during startup"
+
+        for shard in pending.values():
+            shard["last_error"] = "startup timed out"
+        ready = sum(shard["ready"] for shard in self._shards)
+        print(f"✅ {ready}/{self.num_shards} shards ready "
+              f"({sum(shard['items'] for shard in self._shards)} food items)")
+
+    def _fan_out(self, operation: str, kwargs: Dict[str, Any]) -> List[Any]:
+        """Send one request to every ready shard and collect the replies before the deadline"""
+        request_id = next(self._request_ids)
+        pending = {}
+        for shard in self._shards:
+            if not shard["ready"] or not shard["process"].is_alive():
+                continue
+            try:
+                shard["connection"].send((operation, request_id, kwargs))
+                shard["requests"] += 1
+                pending[shard["connection"]] = shard
+            except (BrokenPipeError, OSError) as e:
+                shard["ready"] = False
+                shard["last_error"] = str(e)
+
+        replies = []
+        deadline = time.time() + self.timeout
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            for connection in wait(list(pending), timeout=remaining):
+                shard = pending[connection]
+                try:
+                    reply_id, status, result, latency = connection.recv()
+                except EOFError:
+                    shard["ready"] = False
+                    shard["last_error"] = "worker exited"
+                    del pending[connection]
+                    continue
+                # Late reply to an earlier request that timed out
+                if reply_id != request_id:
+                    continue
+                del pending[connection]
+                shard["last_latency"] = latency
+                if status == "ok":
+                    replies.append(result)
+                else:
+                    shard["errors"] += 1
+                    shard["last_error"] = result
+
+        for shard in pending.values():
+            shard["timeouts"] += 1
+            shard["last_error"] = f"timed out after {self.timeout}s"
+        if pending:
+            print(f"⚠️  {len(pending)} shard(s) did not answer; results are partial")
+        return replies
+
+    @staticmethod
+    def _merge_top_k(shard_results: List[List[Dict]], n_results: int) -> List[Dict]:
+        """Merge per-shard top-k lists into a global top-k by similarity score"""
+        return heapq.nlargest(
+            n_results,
+            itertools.chain.from_iterable(shard_results),
+            key=lambda result: result['similarity_score'],
+        )
+
+    def perform_similarity_search(self, query: str, n_results: int = 5) -> List[Dict]:
+        """Sharded equivalent of shared_functions.perform_similarity_search"""
+        shard_results = self._fan_out("search", {"query": query, "n_results": n_results})
+        return self._merge_top_k(shard_results, n_results)
+
+    def perform_filtered_similarity_search(self, query: str, cuisine_filter: str = None,
+                                           max_calories: int = None, n_results: int = 5) -> List[Dict]:
+        """Sharded equivalent of shared_functions.perform_filtered_similarity_search"""
+        shard_results = self._fan_out("filtered_search", {
+            "query": query,
+            "cuisine_filter": cuisine_filter,
+            "max_calories": max_calories,
+            "n_results": n_results,
+        })
+        return self._merge_top_k(shard_results, n_results)
+
+    def shard_health(self) -> List[Dict[str, Any]]:
+        """Ping every shard and report liveness, size, latency and error counters"""
+        start_time = time.time()
+        self._fan_out("health", {})
+        ping_time = time.time() - start_time
+
+        return [
+            {
+                "shard_id": shard["shard_id"],
+                "pid": shard["process"].pid,
+                "alive": shard["process"].is_alive(),
+                "ready": shard["ready"],
+                "items": shard["items"],
+                "requests": shard["requests"],
+                "errors": shard["errors"],
+                "timeouts": shard["timeouts"],
+                "last_latency": shard["last_latency"],
+                "last_error": shard["last_error"],
+                "ping_time": ping_time,
+            }
+            for shard in self._shards
+        ]
+
+    def close(self) -> None:
+        """Stop all worker processes"""
+        for shard in self._shards:
+            try:
+                shard["connection"].send(("stop", 0, {}))
+            except (BrokenPipeError, OSError):
+                pass
+        for shard in self._shards:
+            shard["process"].join(timeout=5)
+            if shard["process"].is_alive():
+                shard["process"].terminate()
+            shard["connection"].close()
+        self._shards = []
+
+
+def display_shard_health(health: List[Dict[str, Any]]) -> None:
+    """Print a shard health table"""
+    print("\n🩺 SHARD HEALTH")
+    print("-" * 50)
+    for shard in health:
+        status = "✅" if shard["alive"] and shard["ready"] else "❌"
+        latency = f"{shard['last_latency'] * 1000:.1f} ms" if shard["last_latency"] is not None else "n/a"
+        print(f"{status} Shard {shard['shard_id']} (pid {shard['pid']}): {shard['items']} items, "
+              f"last latency {latency}, errors {shard['errors']}, timeouts {shard['timeouts']}")
+        if shard["last_error"]:
+            print(f"   Last error: {shard['last_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded food similarity search")
+    parser.add_argument("query", nargs="?", default="chocolate dessert")
+    parser.add_argument("--data", default="./FoodDataSet.json")
+    parser.add_argument("--shards", type=int, default=None)
+    parser.add_argument("-n", "--n-results", type=int, default=5)
+    args = parser.parse_args()
+
+    from shared_functions import load_food_data
+
+    food_items = load_food_data(args.data)
+    with ShardedFoodSearch(food_items, num_shards=args.shards) as search:
+        start_time = time.time()
+        results = search.perform_similarity_search(args.query, args.n_results)
+        search_time = time.time() - start_time
+
+        print(f"\n🔍 Results for '{args.query}':")
+        for i, result in enumerate(results, 1):
+            print(f"{i}. {result['food_name']} ({result['similarity_score'] * 100:.1f}% match)")
+        print(f"⏱️ Response time: {search_time:.3f} seconds")
+
+        display_shard_health(search.shard_health())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Import-time budget check for the PROJECT-3 CLI tools.
+
+Imports each tool in a fresh interpreter and fails if the import takes longer
+than the budget or pulls in a heavy library (chromadb, torch, ...) before the
+first search. Run it after changing imports in shared_functions.py:
+
+    python3.11 startup_time_check.py
+"""
+import subprocess
+import sys
+
+# Seconds allowed for importing a tool module in a fresh interpreter
+IMPORT_BUDGET_SECONDS = 0.5
+
+CLI_MODULES = [
+    "shared_functions",
+    "interactive_search",
+    "advanced_search",
+    "calorie_checker",
+    "result_limiter",
+    "system_comparison",
+    "enhanced_rag_chatbot",
+]
+
+HEAVY_MODULES = [
+    "chromadb",
+    "numpy",
+    "torch",
+    "sentence_transformers",
+    "ibm_watsonx_ai",
+]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(f"{{elapsed}}|{{','.join(loaded)}}")
+"""
+
+
+def measure_import(module: str):
+    """Import a module in a fresh interpreter and return (seconds, heavy modules loaded)"""
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, loaded = completed.stdout.strip().splitlines()[-1].split("|")
+    return float(elapsed), [name for name in loaded.split(",") if name]
+
+
+def main():
+    print("⏱️ IMPORT-TIME BUDGET CHECK")
+    print("=" * 45)
+
+    failures = []
+    for module in CLI_MODULES:
+        elapsed, loaded = measure_import(module)
+        ok = elapsed <= IMPORT_BUDGET_SECONDS and not loaded
+        print(f"{'✅' if ok else '❌'} {module}: {elapsed * 1000:.1f} ms")
+        if loaded:
+            print(f"   Eagerly imported: {', '.join(loaded)}")
+        if not ok:
+            failures.append(module)
+
+    print("=" * 45)
+    if failures:
+        print(f"❌ {len(failures)} module(s) over the {IMPORT_BUDGET_SECONDS}s budget or importing heavy libraries")
+        sys.exit(1)
+    print(f"✅ All modules import within {IMPORT_BUDGET_SECONDS}s without heavy libraries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Offline benchmark of the RequirementAgent configurations in t5.py - t10.py.
+
+Each configuration runs the same ANALYSIS_QUERY as its script, but:
+- the watsonx model is replaced by ReplayChatModel, which answers from recorded responses
+  in benchmark_fixtures.json (think steps, Wikipedia queries, final answer) and only
+  uses the tools the agent's requirements allow at each step;
+- Wikipedia results come from the same fixtures through the tool cache in replay mode;
+- AskPermissionRequirement prompts are approved automatically.
+
+With --empty-results every Wikipedia search returns [] instead, the case the speculative
+final-answer mode (speculative_answer.py, used by t8 and t9) is meant for; with
+--speculative compare each configuration also runs with that mode off, and the steps and
+wall time it saved are reported (use --llm-latency, since the mode saves model latency,
+not steps).
+
+No network access or credentials are needed, and the runs are deterministic, so the
+numbers can be compared before and after tuning requirement settings:
+
+    python agent_benchmark.py                    # table of steps, calls, tokens, wall time
+    python agent_benchmark.py --llm-latency 0.5  # add simulated model latency per call
+    python agent_benchmark.py --output results.json
+    python agent_benchmark.py --empty-results --speculative compare --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import atexit
+import contextlib
+import importlib
+import io
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from math import ceil
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_PATH = os.path.join(BENCHMARK_DIR, "benchmark_fixtures.json")
+
+# (module, example function, what the configuration adds)
+CONFIGURATIONS = [
+    ("t5", "minimal_tracked_agent_example", "LLM only"),
+    ("t6", "wikipedia_enhanced_agent_example", "+ Wikipedia"),
+    ("t7", "reasoning_enhanced_agent_example", "+ ThinkTool"),
+    ("t8", "controlled_execution_example", "+ tighter conditions"),
+    ("t9", "reasoning_enhanced_agent_example", "think after every tool"),
+    ("t10", "production_security_example", "+ AskPermission"),
+]
+
+# Keep replayed tool results and exported spans out of the working directory; these must
+# be set before the example modules (and with them tool_cache) are imported
+_scratch = tempfile.mkdtemp(prefix="agent_benchmark_")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+os.environ["TOOL_CACHE_PATH"] = os.path.join(_scratch, "tool_cache.sqlite")
+os.environ["TOOL_CACHE_OFFLINE"] = "1"
+os.environ["TRAJECTORY_EXPORT_PATH"] = os.path.join(_scratch, "trajectory_spans.jsonl")
+sys.path.insert(0, BENCHMARK_DIR)
+
+from beeai_framework.agents.experimental.events import RequirementAgentStartEvent
+from beeai_framework.backend import AssistantMessage, ChatModel
+from beeai_framework.backend.message import MessageToolCallContent
+from beeai_framework.backend.types import ChatModelOutput, ChatModelUsage
+from beeai_framework.emitter import Emitter, EmitterOptions
+from beeai_framework.tools.search.wikipedia.wikipedia import WikipediaToolInput, WikipediaToolOutput, WikipediaToolResult
+from beeai_framework.utils.io import setup_io_context
+from bounded_memory import message_text
+from tool_cache import ToolResultCache, default_cache
+
+def load_fixtures(path=FIXTURES_PATH):
+    with open(path, encoding="utf-8") as fixtures_file:
+        return json.load(fixtures_file)
+
+def seed_tool_cache(fixtures, empty_results=False):
+    """Record the Wikipedia fixtures in the (offline) tool cache used by CachedWikipediaTool."""
+    cache = default_cache()
+    for query, pages in fixtures["wikipedia_pages"].items():
+        key, canonical = ToolResultCache.key(WikipediaToolInput(query=query))
+        results = [] if empty_results else [WikipediaToolResult(**page) for page in pages]
+        cache.set("Wikipedia", key, canonical, WikipediaToolOutput(results))
+
+class ReplayChatModel(ChatModel):
+    """Plays back recorded responses, choosing among the tools the agent currently allows.
+
+    Progress is read from the conversation itself (how many think / Wikipedia calls it
+    already contains), so every run of the same configuration makes the same calls.
+    """
+
+    def __init__(self, fixtures, latency=0.0):
+        super().__init__()
+        self.fixtures = fixtures
+        self.latency = latency
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def model_id(self):
+        return "replay"
+
+    @property
+    def provider_id(self):
+        return "ollama"
+
+    def reset_stats(self):
+        self.calls = self.prompt_tokens = self.completion_tokens = 0
+
+    def _next_call(self, input):
+        allowed = [tool.name for tool in input.tools or []]
+        if not isinstance(input.tool_choice, str) and input.tool_choice is not None:
+            allowed = [input.tool_choice.name]
+
+        history = [call.tool_name for message in input.messages if isinstance(message, AssistantMessage)
+                   for call in message.get_tool_calls()]
+        thoughts, queries = self.fixtures["think"], self.fixtures["wikipedia_queries"]
+        think_count, wiki_count = history.count("think"), history.count("Wikipedia")
+
+        candidates = []
+        if "think" in allowed and think_count < len(thoughts) and (not history or history[-1] != "think"):
+            candidates.append(("think", thoughts[think_count]))
+        if "Wikipedia" in allowed and wiki_count < len(queries):
+            candidates.append(("Wikipedia", {"query": queries[wiki_count]}))
+        if "final_answer" in allowed:
+            candidates.append(("final_answer", {"response": self.fixtures["final_answer"]}))
+        # Requirements may force a tool the recording has run out of; repeat its last entry
+        if not candidates and "think" in allowed:
+            candidates.append(("think", thoughts[-1]))
+        if not candidates and "Wikipedia" in allowed:
+            candidates.append(("Wikipedia", {"query": queries[-1]}))
+        if not candidates:
+            raise ValueError(f"No recorded response for the allowed tools {allowed}")
+        return candidates[0]
+
+    async def _create(self, input, run):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if input.tools:
+            tool_name, args = self._next_call(input)
+            completion = json.dumps(args)
+        else:
+            # A plain completion, e.g. the speculative final answer
+            tool_name, completion = None, self.fixtures["final_answer"]
+        usage = ChatModelUsage(
+            prompt_tokens=sum(ceil(len(message_text(message)) / 4) for message in input.messages),
+            completion_tokens=ceil(len(completion) / 4),
+            total_tokens=0,
+        )
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        self.calls += 1
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        if tool_name is None:
+            return ChatModelOutput(messages=[AssistantMessage(completion)], usage=usage, finish_reason="stop")
+        call = MessageToolCallContent(id=f"call_{self.calls}", tool_name=tool_name, args=completion)
+        return ChatModelOutput(messages=[AssistantMessage(call)], usage=usage, finish_reason="tool_calls")
+
+    def _create_stream(self, input, run):
+        raise NotImplementedError("ReplayChatModel does not stream")
+
+    async def _create_structure(self, input, run):
+        raise NotImplementedError("ReplayChatModel does not produce structured output")
+
+    async def clone(self):
+        return ReplayChatModel(self.fixtures, self.latency)
+
+class StepCounter:
+    """Counts agent steps and tool calls from the events of every run."""
+
+    def __init__(self):
+        self.steps = 0
+        self.tool_calls = {}
+        Emitter.root().match("*.*", self._on_event, EmitterOptions(match_nested=True))
+
+    def reset(self):
+        self.steps = 0
+        self.tool_calls = {}
+
+    def _on_event(self, data, event):
+        if event.name == "start" and isinstance(data, RequirementAgentStartEvent):
+            self.steps += 1
+        elif event.name == "start" and event.path.startswith("tool."):
+            name = getattr(event.creator, "name", event.path)
+            self.tool_calls[name] = self.tool_calls.get(name, 0) + 1
+
+async def approve(prompt):
+    return "yes"
+
+async def run_configuration(module_name, function_name, model, counter, speculative=True):
+    module = importlib.import_module(module_name)
+    model.reset_stats()
+    counter.reset()
+    os.environ["SPECULATIVE_ANSWER"] = "1" if speculative else "0"
+
+    # The examples create their model with ChatModel.from_name(...)
+    original_from_name = ChatModel.from_name
+    ChatModel.from_name = staticmethod(lambda *args, **kwargs: model)
+    start_time = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await getattr(module, function_name)()
+    finally:
+        ChatModel.from_name = original_from_name
+    wall_time = time.perf_counter() - start_time
+
+    return {
+        "steps": counter.steps,
+        "llm_calls": model.calls,
+        "tool_calls": sum(count for name, count in counter.tool_calls.items() if name != "final_answer"),
+        "prompt_tokens": model.prompt_tokens,
+        "completion_tokens": model.completion_tokens,
+        "wall_time": wall_time,
+    }
+
+async def measure(module_name, function_name, label, model, counter, repeat, speculative):
+    runs = [await run_configuration(module_name, function_name, model, counter, speculative) for _ in range(repeat)]
+    # Everything but the wall time is deterministic; report the median time
+    result = {"config": module_name, "label": label, **runs[0]}
+    result["wall_time"] = statistics.median(run["wall_time"] for run in runs)
+    return result
+
+async def benchmark(repeat=3, llm_latency=0.0, empty_results=False, speculative="on"):
+    fixtures = load_fixtures()
+    seed_tool_cache(fixtures, empty_results)
+    model = ReplayChatModel(fixtures, llm_latency)
+    counter = StepCounter()
+    restore_io = setup_io_context(read=approve)
+
+    results = []
+    try:
+        for module_name, function_name, label in CONFIGURATIONS:
+            result = await measure(module_name, function_name, label, model, counter, repeat, speculative != "off")
+            if speculative == "compare":
+                baseline = await measure(module_name, function_name, label, model, counter, repeat, False)
+                result["steps_saved"] = baseline["steps"] - result["steps"]
+                result["baseline_wall_time"] = baseline["wall_time"]
+                result["wall_time_saved"] = baseline["wall_time"] - result["wall_time"]
+            results.append(result)
+    finally:
+        restore_io()
+    return results
+
+def print_results(results, llm_latency):
+    print(f"RequirementAgent configurations, replayed offline (simulated LLM latency {llm_latency}s)")
+    compare = "steps_saved" in results[0]
+    print("-" * (124 if compare else 100))
+    print(f"{'Config':<6} {'Adds':<24} {'Steps':>5} {'LLM calls':>9} {'Tool calls':>10} "
+          f"{'Prompt tok':>10} {'Compl. tok':>10} {'Wall time':>10}" + (f" {'Steps saved':>11} {'Time saved':>11}" if compare else ""))
+    for result in results:
+        line = (f"{result['config']:<6} {result['label']:<24} {result['steps']:>5} {result['llm_calls']:>9} "
+                f"{result['tool_calls']:>10} {result['prompt_tokens']:>10} {result['completion_tokens']:>10} "
+                f"{result['wall_time'] * 1000:>8.1f}ms")
+        if compare:
+            line += f" {result['steps_saved']:>11} {result['wall_time_saved'] * 1000:>9.1f}ms"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the t5-t10 RequirementAgent configurations")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the median wall time is reported")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--empty-results", action="store_true", help="Every Wikipedia search returns no results")
+    parser.add_argument("--speculative", choices=["on", "off", "compare"], default="on",
+                        help="Speculative final-answer mode for the agents that use it (t8, t9)")
+    parser.add_argument("--output", help="Also write the results as JSON, e.g. to compare against a baseline")
+    args = parser.parse_args()
+
+    logging.getLogger('asyncio').setLevel(logging.CRITICAL)
+    results = asyncio.run(benchmark(args.repeat, args.llm_latency, args.empty_results, args.speculative))
+    print_results(results, args.llm_latency)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+if __name__ == "__main__":
+    main()
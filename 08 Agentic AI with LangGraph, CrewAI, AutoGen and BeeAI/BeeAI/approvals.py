@@ -0,0 +1,182 @@
+"""
+Pluggable approval providers for AskPermissionRequirement.
+
+The default AskPermissionRequirement handler asks on the console, which blocks the whole
+event loop until someone types an answer. The providers below are async handlers
+(AskPermissionRequirement(..., handler=provider)), so only the run that needs an
+approval waits while other agent runs carry on:
+
+- PolicyApprovalProvider answers from a JSON policy file:
+      {"default": "deny", "tools": {"Wikipedia": "allow", "WeatherPlanning": "ask"}}
+  "ask" is passed on to a fallback provider (e.g. the queue below).
+- ApprovalQueue keeps pending requests in memory and serves them on a local HTTP
+  endpoint (started on first use, bound to 127.0.0.1):
+      GET  /approvals          pending requests
+      POST /approvals/<id>     {"approved": true} or {"approved": false}
+      GET  /stats              approval latency per source
+  A request nobody answers within the timeout is denied.
+
+Every decision is recorded with its wait time, so approval latency can be reported
+separately from LLM and tool time.
+
+approval_handler() builds the provider from the environment (APPROVAL_POLICY_FILE,
+APPROVAL_SERVER_PORT, APPROVAL_TIMEOUT_SECONDS) and returns None when neither is set,
+which keeps the interactive console prompt.
+"""
+import asyncio
+import itertools
+import json
+import os
+import time
+from beeai_framework.utils.strings import to_json
+
+DEFAULT_TIMEOUT_SECONDS = 300
+
+class ApprovalStats:
+    """Wait time of every approval decision, grouped by where the decision came from."""
+
+    def __init__(self):
+        self.decisions = []
+
+    def record(self, tool, approved, seconds, source):
+        self.decisions.append({"tool": tool, "approved": approved, "seconds": seconds, "source": source})
+
+    def summary(self):
+        by_source = {}
+        for decision in self.decisions:
+            by_source.setdefault(decision["source"], []).append(decision)
+        summary = {}
+        for source, decisions in by_source.items():
+            waits = sorted(decision["seconds"] for decision in decisions)
+            summary[source] = {
+                "count": len(decisions),
+                "approved": sum(decision["approved"] for decision in decisions),
+                "mean_seconds": sum(waits) / len(waits),
+                "p95_seconds": waits[min(len(waits) - 1, int(len(waits) * 0.95))],
+            }
+        return summary
+
+    def print_summary(self):
+        if not self.decisions:
+            return
+        print("\n🔐 Approval latency")
+        for source, entry in self.summary().items():
+            print(f"   {source:<8} {entry['count']} requests, {entry['approved']} approved, "
+                  f"mean {entry['mean_seconds']:.2f}s, p95 {entry['p95_seconds']:.2f}s")
+
+class PolicyApprovalProvider:
+    def __init__(self, path, fallback=None, stats=None):
+        with open(path) as policy_file:
+            policy = json.load(policy_file)
+        self.default = policy.get("default", "deny")
+        self.tools = policy.get("tools", {})
+        self.fallback = fallback
+        self.stats = stats or (fallback.stats if fallback else ApprovalStats())
+
+    async def __call__(self, tool, input):
+        decision = self.tools.get(tool.name, self.default)
+        if decision == "ask" and self.fallback is not None:
+            return await self.fallback(tool, input)
+        # Without a fallback, "ask" is treated as a denial rather than blocking on the console
+        approved = decision == "allow"
+        self.stats.record(tool.name, approved, 0.0, "policy")
+        return approved
+
+class ApprovalQueue:
+    def __init__(self, port=8765, host="127.0.0.1", timeout=DEFAULT_TIMEOUT_SECONDS, stats=None):
+        self.port = port
+        self.host = host
+        self.timeout = timeout
+        self.stats = stats or ApprovalStats()
+        self.pending = {}
+        self._ids = itertools.count(1)
+        self._server = None
+
+    async def start(self):
+        if self._server is None:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            print(f"🔐 Approval queue listening on http://{self.host}:{self.port}/approvals")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __call__(self, tool, input):
+        await self.start()
+        request_id = str(next(self._ids))
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = {"tool": tool.name, "input": input, "created": time.time(), "future": future}
+        print(f"🔐 Approval {request_id} pending: {tool.name} {to_json(input)}")
+
+        source = "queue"
+        try:
+            approved = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            approved, source = False, "timeout"
+        finally:
+            request = self.pending.pop(request_id)
+        self.stats.record(tool.name, approved, time.time() - request["created"], source)
+        return approved
+
+    def decide(self, request_id, approved):
+        request = self.pending.get(request_id)
+        if request is None or request["future"].done():
+            return False
+        request["future"].set_result(bool(approved))
+        return True
+
+    def _route(self, method, path, body):
+        if method == "GET" and path == "/approvals":
+            now = time.time()
+            return 200, {"pending": [
+                {"id": request_id, "tool": request["tool"], "input": json.loads(to_json(request["input"])),
+                 "waiting_seconds": round(now - request["created"], 3)}
+                for request_id, request in self.pending.items()
+            ]}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats.summary()
+        if method == "POST" and path.startswith("/approvals/"):
+            request_id = path.removeprefix("/approvals/")
+            decision = json.loads(body or b"{}")
+            approved = decision.get("approved") if isinstance(decision, dict) else None
+            if not isinstance(approved, bool):
+                return 400, {"error": 'Body must be {"approved": true} or {"approved": false}'}
+            if not self.decide(request_id, approved):
+                return 404, {"error": f"No pending approval {request_id}"}
+            return 200, {"id": request_id, "approved": approved}
+        return 404, {"error": "Not found"}
+
+    async def _handle(self, reader, writer):
+        # Just enough HTTP/1.1 for curl and scripts: one JSON request per connection
+        try:
+            try:
+                method, path, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = self._route(method, path.split("?")[0], body)
+            except (ValueError, json.JSONDecodeError, asyncio.IncompleteReadError) as e:
+                status, payload = 400, {"error": str(e)}
+
+            data = json.dumps(payload).encode("utf-8")
+            reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}[status]
+            writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+def approval_handler():
+    """Approval provider configured by the environment, or None for the console prompt."""
+    policy_path = os.getenv("APPROVAL_POLICY_FILE")
+    port = os.getenv("APPROVAL_SERVER_PORT")
+    timeout = float(os.getenv("APPROVAL_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS))
+
+    queue = ApprovalQueue(int(port), timeout=timeout) if port else None
+    if policy_path:
+        return PolicyApprovalProvider(policy_path, fallback=queue)
+    return queue
@@ -0,0 +1,227 @@
+"""
+Token-budgeted memory for RequirementAgents.
+
+UnconstrainedMemory resends the whole transcript on every step, including raw Wikipedia
+payloads of several thousand characters each, so prompts grow without bound. Here:
+
+- BoundedMemory replaces UnconstrainedMemory and keeps the conversation carried between
+  runs under a token budget.
+- MemoryBudgetMiddleware applies the same budget to the transcript of the current run
+  before every LLM call (RequirementAgent builds that transcript in its own memory),
+  and reports the prompt tokens saved at each step.
+
+Compaction first shortens bulky tool outputs to a snippet plus a reference (the full
+text stays available in BoundedMemory.tool_outputs), then replaces the oldest turns with
+a short extractive summary until the transcript fits. The task message and the latest
+turn are never removed.
+
+    memory = BoundedMemory(max_tokens=3000)
+    agent = RequirementAgent(..., memory=memory, middlewares=[MemoryBudgetMiddleware()])
+"""
+import hashlib
+from math import ceil
+from beeai_framework.agents.experimental.events import RequirementAgentStartEvent
+from beeai_framework.backend import AssistantMessage, ToolMessage, UserMessage
+from beeai_framework.backend.message import MessageToolResultContent
+from beeai_framework.context import RunMiddlewareProtocol
+from beeai_framework.memory import BaseMemory
+from beeai_framework.utils.strings import to_json
+
+SUMMARY_HEADER = "Summary of earlier steps (removed from the conversation to save tokens):"
+SNIPPET_CHARS = 200
+
+def message_text(message):
+    """Text that is sent to the model for a message, including tool calls and results."""
+    if isinstance(message, ToolMessage):
+        return "".join(result_text(result) for result in message.get_tool_results())
+    if isinstance(message, AssistantMessage):
+        return message.text + "".join(call.tool_name + call.args for call in message.get_tool_calls())
+    return message.text
+
+def result_text(result):
+    return result.result if isinstance(result.result, str) else to_json(result.result)
+
+def estimate_tokens(messages):
+    # Same 4-characters-per-token estimate as BeeAI's TokenMemory
+    return sum(ceil(len(message_text(message)) / 4) for message in messages)
+
+def snippet(text, limit=SNIPPET_CHARS):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def truncate_tool_message(message, max_chars, tool_outputs):
+    """Shorten long tool results to a snippet and keep the full text under a reference."""
+    if message.meta.get("truncated"):
+        return message
+    results = []
+    changed = False
+    for result in message.get_tool_results():
+        text = result_text(result)
+        if len(text) > max_chars:
+            ref = hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+            tool_outputs[ref] = text
+            text = f"{text[:max_chars]}\n...[{len(text) - max_chars} more characters truncated, full output ref:{ref}]"
+            changed = True
+        results.append(MessageToolResultContent(result=text, tool_name=result.tool_name, tool_call_id=result.tool_call_id))
+    if not changed:
+        return message
+    return ToolMessage(results, {**message.meta, "truncated": True})
+
+def group_turns(messages):
+    """Split a transcript into turns: an assistant tool-call message stays with its tool results."""
+    turns = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and turns:
+            turns[-1].append(message)
+        else:
+            turns.append([message])
+    return turns
+
+def summarize_turn(turn):
+    lines = []
+    results = {result.tool_call_id: result_text(result)
+               for message in turn if isinstance(message, ToolMessage) for result in message.get_tool_results()}
+    for message in turn:
+        if message.meta.get("memorySummary"):
+            lines.extend(message.text.splitlines()[1:])
+        elif isinstance(message, AssistantMessage):
+            for call in message.get_tool_calls():
+                lines.append(f"- Called {call.tool_name}({snippet(call.args, 120)}) -> {snippet(results.get(call.id, ''))}")
+            if message.text.strip():
+                lines.append(f"- Assistant: {snippet(message.text)}")
+        elif isinstance(message, UserMessage):
+            lines.append(f"- User: {snippet(message.text)}")
+    return lines
+
+def compact_messages(messages, max_tokens, max_tool_chars, keep_recent_tool_results, tool_outputs):
+    """Return (messages, stats) with the transcript shrunk towards max_tokens."""
+    stats = {"tokens_before": estimate_tokens(messages), "truncated": 0, "summarized": 0}
+    messages = list(messages)
+
+    # 1. Shorten old tool outputs; the most recent ones stay intact unless the budget needs them too
+    tool_indexes = [i for i, message in enumerate(messages) if isinstance(message, ToolMessage)]
+    for keep in (keep_recent_tool_results, 0):
+        for i in tool_indexes[:max(0, len(tool_indexes) - keep)]:
+            shortened = truncate_tool_message(messages[i], max_tool_chars, tool_outputs)
+            if shortened is not messages[i]:
+                messages[i] = shortened
+                stats["truncated"] += 1
+        if estimate_tokens(messages) <= max_tokens:
+            break
+
+    # 2. Fold the oldest turns into one summary message, keeping the task and the latest turn
+    turns = group_turns(messages)
+    task = next((turn for turn in reversed(turns) if isinstance(turn[0], UserMessage)), None)
+    previous = next((turn for turn in turns if turn[0].meta.get("memorySummary")), None)
+    summary_lines = summarize_turn(previous) if previous else []
+    remaining = [turn for turn in turns if turn is not previous]
+    while estimate_tokens(messages) > max_tokens:
+        candidates = [turn for turn in remaining[:-1] if turn is not task]
+        if not candidates:
+            break
+        summary_lines.extend(summarize_turn(candidates[0]))
+        stats["summarized"] += len(candidates[0])
+        remaining = [turn for turn in remaining if turn is not candidates[0]]
+        summary = AssistantMessage("\n".join([SUMMARY_HEADER, *summary_lines]), {"memorySummary": True})
+        messages = [summary, *(message for turn in remaining for message in turn)]
+
+    stats["tokens_after"] = estimate_tokens(messages)
+    stats["saved"] = stats["tokens_before"] - stats["tokens_after"]
+    return messages, stats
+
+class BoundedMemory(BaseMemory):
+    """Drop-in replacement for UnconstrainedMemory that stays within a token budget."""
+
+    def __init__(self, max_tokens=3000, max_tool_chars=800, keep_recent_tool_results=1):
+        self.max_tokens = max_tokens
+        self.max_tool_chars = max_tool_chars
+        self.keep_recent_tool_results = keep_recent_tool_results
+        self.tool_outputs = {}  # ref -> full text of every truncated tool output
+        self._messages = []
+
+    @property
+    def messages(self):
+        return self._messages
+
+    async def add(self, message, index=None):
+        index = len(self._messages) if index is None else max(0, min(index, len(self._messages)))
+        self._messages.insert(index, message)
+        self.compact()
+
+    async def add_many(self, messages, start=None):
+        # Compact once for the whole batch instead of after every message
+        for counter, message in enumerate(messages):
+            index = len(self._messages) if start is None else max(0, min(start + counter, len(self._messages)))
+            self._messages.insert(index, message)
+        self.compact()
+
+    async def delete(self, message):
+        try:
+            self._messages.remove(message)
+            return True
+        except ValueError:
+            return False
+
+    def reset(self):
+        self._messages.clear()
+
+    def compact(self, messages=None):
+        """Compact this memory (or the given transcript) and return the stats."""
+        compacted, stats = compact_messages(
+            self._messages if messages is None else messages,
+            self.max_tokens, self.max_tool_chars, self.keep_recent_tool_results, self.tool_outputs,
+        )
+        if messages is None:
+            self._messages = compacted
+        return compacted, stats
+
+    async def clone(self):
+        cloned = BoundedMemory(self.max_tokens, self.max_tool_chars, self.keep_recent_tool_results)
+        cloned._messages = self._messages.copy()
+        cloned.tool_outputs = self.tool_outputs
+        return cloned
+
+class MemoryBudgetMiddleware(RunMiddlewareProtocol):
+    """Applies the agent's BoundedMemory budget to the in-run transcript before each LLM call."""
+
+    def __init__(self, memory=None, verbose=True):
+        self.memory = memory
+        self.verbose = verbose
+        self.steps = []
+        self._removed = 0
+        self._cleanup = None
+
+    def bind(self, ctx):
+        if self._cleanup:
+            self._cleanup()
+        self.steps = []
+        self._removed = 0
+        memory = self.memory or getattr(ctx.instance, "memory", None)
+        if not isinstance(memory, BoundedMemory):
+            memory = BoundedMemory()
+        self._cleanup = ctx.emitter.on("start", lambda data, event: self._on_step(memory, data))
+
+    async def _on_step(self, memory, data):
+        if not isinstance(data, RequirementAgentStartEvent):
+            return
+        state = data.state
+        compacted, stats = memory.compact(state.memory.messages)
+        if stats["saved"]:
+            state.memory.reset()
+            await state.memory.add_many(compacted)
+
+        # Compacted messages stay compacted, so the saving against an unbounded prompt accumulates
+        self._removed += stats["saved"]
+        stats["iteration"] = state.iteration
+        stats["unbounded_tokens"] = stats["tokens_after"] + self._removed
+        stats["prompt_saved"] = self._removed
+        self.steps.append(stats)
+        if self.verbose and self._removed:
+            print(f"🧠 Step {state.iteration}: prompt memory {stats['tokens_after']} tokens instead of "
+                  f"{stats['unbounded_tokens']} (saved {stats['prompt_saved']}; this step truncated "
+                  f"{stats['truncated']} tool outputs, summarized {stats['summarized']} messages)")
+
+    @property
+    def total_saved(self):
+        """Prompt tokens saved over the last run compared to UnconstrainedMemory."""
+        return sum(step["prompt_saved"] for step in self.steps)
@@ -0,0 +1,85 @@
+import asyncio
+import timeit
+import safe_arithmetic
+from safe_arithmetic import evaluate, parse
+from t11 import SimpleCalculatorTool
+
+# Benchmark: the AST evaluator behind SimpleCalculatorTool (safe_arithmetic.py) vs the
+# previous implementation, which called eval() on every expression, and many single-
+# expression tool calls vs one batch call. Run with: python calculator_benchmark.py
+
+ITERATIONS = 20000
+
+def legacy_calculate(expression: str) -> float:
+    """The previous SimpleCalculatorTool._safe_calculate, kept here for comparison."""
+    expr = expression.replace(' ', '')
+    allowed_chars = set('0123456789+-*/().')
+    if not all(c in allowed_chars for c in expr):
+        raise ValueError("Only numbers and basic operators (+, -, *, /, parentheses) are allowed")
+    try:
+        result = eval(expr, {"__builtins__": {}}, {})
+        return float(result)
+    except ZeroDivisionError:
+        raise ValueError("Division by zero is not allowed")
+    except Exception as e:
+        raise ValueError(f"Invalid arithmetic expression: {str(e)}")
+
+# The queries from t11.py plus a longer expression
+EXPRESSIONS = {
+    "Addition": "15 + 27",
+    "Division": "144 / 12",
+    "Mixed": "(10 + 5) * 3 - 7",
+    "Long": " + ".join(f"({i} * {i + 1} - {i} / 4)" for i in range(1, 16)),
+}
+
+def benchmark(name, expression):
+    assert abs(legacy_calculate(expression) - evaluate(expression)) < 1e-9, "Results differ"
+    legacy_time = timeit.timeit(lambda: legacy_calculate(expression), number=ITERATIONS) / ITERATIONS
+
+    def cold():
+        parse.cache_clear()
+        return evaluate(expression)
+
+    cold_time = timeit.timeit(cold, number=ITERATIONS) / ITERATIONS
+    cached_time = timeit.timeit(lambda: evaluate(expression), number=ITERATIONS) / ITERATIONS
+    print(f"{name:10} eval: {legacy_time * 1e6:8.2f} us   ast (first time): {cold_time * 1e6:8.2f} us   "
+          f"ast (repeated): {cached_time * 1e6:7.2f} us   speedup: {legacy_time / cached_time:5.1f}x")
+
+async def tool_calls(count):
+    tool = SimpleCalculatorTool()
+    expressions = [f"{i} * 3 + {i} / 2" for i in range(count)]
+
+    start = timeit.default_timer()
+    for expression in expressions:
+        await tool.run({"expression": expression})
+    single_time = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    await tool.run({"expressions": expressions})
+    batch_time = timeit.default_timer() - start
+    print(f"{count} expressions  one call each: {single_time * 1000:7.2f} ms   one batch call: {batch_time * 1000:7.2f} ms")
+
+def limit_check(expression):
+    start = timeit.default_timer()
+    try:
+        evaluate(expression)
+        outcome = "accepted"
+    except ValueError as e:
+        outcome = f"rejected ({e})"
+    print(f"{expression[:20]:22} {outcome} in {(timeit.default_timer() - start) * 1e6:.0f} us")
+
+if __name__ == "__main__":
+    print(f"Expression evaluation ({ITERATIONS} evaluations each)")
+    print("-" * 112)
+    for name, expression in EXPRESSIONS.items():
+        benchmark(name, expression)
+
+    print("\nTool calls (each call also costs an LLM round-trip in an agent run)")
+    print("-" * 80)
+    asyncio.run(tool_calls(50))
+
+    print(f"\nHostile inputs are bounded before any arithmetic runs "
+          f"(limits: {safe_arithmetic.MAX_OPERATIONS} operations, magnitude {safe_arithmetic.MAX_MAGNITUDE:g})")
+    print("-" * 80)
+    for expression in ["9**9**9", "(" * 200 + "1" + ")" * 200, "+".join(["1"] * 240)]:
+        limit_check(expression)
@@ -0,0 +1,117 @@
+import argparse
+import math
+import random
+import time
+from safe_arithmetic import ALLOWED_CHARS, CalculationError, evaluate
+
+# Fuzz test for the SimpleCalculatorTool evaluator (safe_arithmetic.py).
+#
+# - Random well-formed expressions (+ - * / and unary minus on small numbers) must give
+#   the same result as eval(), or the same kind of failure (division by zero).
+# - Random strings over the allowed characters, and adversarial inputs (huge powers, deep
+#   nesting, long chains), may only ever raise CalculationError, and must finish quickly.
+#
+# Run with: python calculator_fuzz.py [--cases 20000] [--seed 0]
+
+# Generous for a single evaluation; eval() takes far longer on several of these inputs
+MAX_SECONDS_PER_CASE = 0.05
+
+def random_number(rng):
+    if rng.random() < 0.3:
+        return f"{rng.randint(0, 999)}.{rng.randint(0, 99)}"
+    return str(rng.randint(0, 999))
+
+def random_expression(rng, depth=0):
+    """A well-formed expression eval() can handle safely (no powers)."""
+    roll = rng.random()
+    if depth > 4 or roll < 0.3:
+        return random_number(rng)
+    if roll < 0.4:
+        return f"-{random_expression(rng, depth + 1)}"
+    if roll < 0.5:
+        return f"({random_expression(rng, depth + 1)})"
+    operator = rng.choice(["+", "-", "*", "/"])
+    return f"{random_expression(rng, depth + 1)} {operator} {random_expression(rng, depth + 1)}"
+
+def random_garbage(rng):
+    alphabet = sorted(ALLOWED_CHARS) + ["**", "//"] * 3
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+
+ADVERSARIAL = [
+    "9**9**9",
+    "2**2**2**2**2",
+    "(10**10)**(10**10)",
+    "-(2**1000)",
+    "10**30*10",
+    "0**-1",
+    "(-8)**0.5",
+    "1/0.0",
+    "99999999999999999999999999999*99999999999999999999999999",
+    "(" * 100 + "1" + ")" * 100,
+    "(" * 1000 + "1" + ")" * 1000,
+    "-" * 499 + "1",
+    "+".join(["1"] * 250),
+    "1" * 500,
+    "",
+    "()",
+    "1..2",
+    "1 2",
+]
+
+def check_against_eval(expression):
+    try:
+        expected = float(eval(expression, {"__builtins__": {}}, {}))
+    except ZeroDivisionError:
+        expected = ZeroDivisionError
+    try:
+        actual = evaluate(expression)
+    except CalculationError as e:
+        if expected is ZeroDivisionError or abs(expected) > 1e30:
+            return None
+        return f"raised {e!r}, eval() gives {expected}"
+    if expected is ZeroDivisionError:
+        return f"gave {actual}, eval() divides by zero"
+    if not math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9):
+        return f"gave {actual}, eval() gives {expected}"
+    return None
+
+def check_never_crashes(expression):
+    try:
+        evaluate(expression)
+    except CalculationError:
+        pass
+    except Exception as e:
+        return f"raised {type(e).__name__}: {e}"
+    return None
+
+def run_case(check, expression, failures):
+    start = time.perf_counter()
+    problem = check(expression)
+    elapsed = time.perf_counter() - start
+    if problem is None and elapsed > MAX_SECONDS_PER_CASE:
+        problem = f"took {elapsed * 1000:.1f} ms"
+    if problem:
+        failures.append((expression, problem))
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz the SimpleCalculatorTool evaluator")
+    parser.add_argument("--cases", type=int, default=20000, help="Random expressions of each kind")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = []
+    for _ in range(args.cases):
+        run_case(check_against_eval, random_expression(rng), failures)
+        run_case(check_never_crashes, random_garbage(rng), failures)
+    for expression in ADVERSARIAL:
+        run_case(check_never_crashes, expression, failures)
+
+    total = 2 * args.cases + len(ADVERSARIAL)
+    print(f"{total} cases, {len(failures)} failures (seed {args.seed})")
+    for expression, problem in failures[:20]:
+        print(f"  {expression[:60]!r}: {problem}")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Arithmetic evaluator for SimpleCalculatorTool (t11.py), without eval().
+
+Expressions are parsed once with the ast module, checked against a whitelist of node
+types and limits, and compiled to a small postfix program that is cached, so repeated
+expressions skip parsing entirely. Evaluation checks every intermediate result, and a
+power is refused *before* it is computed if its result would be too large, so inputs
+like 9**9**9 fail in microseconds instead of pinning a CPU core.
+
+Supported: numbers, + - * / // **, unary + and -, parentheses.
+
+    evaluate("(10 + 5) * 3 - 7")          # 38.0
+    evaluate_many(["1 + 1", "2 / 0"])     # [2.0, CalculationError(...)]
+"""
+import ast
+import math
+import operator
+from functools import lru_cache
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_OPERATIONS = 200
+MAX_EXPONENT = 1000
+MAX_MAGNITUDE = 1e30
+PARSE_CACHE_SIZE = 1024
+
+ALLOWED_CHARS = frozenset("0123456789+-*/(). ")
+
+class CalculationError(ValueError):
+    """The expression is invalid, unsafe or has no finite real result."""
+
+def _power(base, exponent):
+    if abs(exponent) > MAX_EXPONENT:
+        raise CalculationError(f"Exponent {exponent} is larger than {MAX_EXPONENT}")
+    # Estimate the size of the result before computing it
+    if abs(base) > 1 and exponent > 0 and exponent * math.log10(abs(base)) > math.log10(MAX_MAGNITUDE):
+        raise CalculationError(f"Result exceeds the magnitude limit of {MAX_MAGNITUDE:g}")
+    if base < 0 and not float(exponent).is_integer():
+        raise CalculationError("Result is not a real number")
+    return base ** exponent
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: _power,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+def _compile(node, program):
+    """Append the postfix form of node to program; returns the number of operations."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        if abs(node.value) > MAX_MAGNITUDE:
+            raise CalculationError(f"Number exceeds the magnitude limit of {MAX_MAGNITUDE:g}")
+        program.append(node.value)
+        return 0
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        operations = _compile(node.left, program) + _compile(node.right, program) + 1
+        program.append((2, BINARY_OPERATORS[type(node.op)]))
+        return operations
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        operations = _compile(node.operand, program) + 1
+        program.append((1, UNARY_OPERATORS[type(node.op)]))
+        return operations
+    raise CalculationError(f"Unsupported element in expression: {type(node).__name__}")
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse(expression):
+    """Validate and compile an expression to a postfix program (a tuple)."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculationError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    if not ALLOWED_CHARS.issuperset(expression):
+        raise CalculationError("Only numbers and basic operators (+, -, *, /, parentheses) are allowed")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except (SyntaxError, RecursionError, MemoryError) as e:
+        raise CalculationError(f"Invalid arithmetic expression: {type(e).__name__}") from None
+
+    program = []
+    if _compile(tree.body, program) > MAX_OPERATIONS:
+        raise CalculationError(f"Expression has more than {MAX_OPERATIONS} operations")
+    return tuple(program)
+
+def run(program):
+    stack = []
+    for step in program:
+        if type(step) is not tuple:
+            stack.append(step)
+            continue
+        arity, function = step
+        try:
+            if arity == 2:
+                right = stack.pop()
+                stack[-1] = function(stack[-1], right)
+            else:
+                stack[-1] = function(stack[-1])
+        except ZeroDivisionError:
+            raise CalculationError("Division by zero is not allowed") from None
+        except OverflowError:
+            raise CalculationError(f"Result exceeds the magnitude limit of {MAX_MAGNITUDE:g}") from None
+        value = stack[-1]
+        if abs(value) > MAX_MAGNITUDE or value != value:
+            raise CalculationError(f"Result exceeds the magnitude limit of {MAX_MAGNITUDE:g}")
+    return float(stack[0])
+
+def evaluate(expression):
+    """Evaluate one expression; raises CalculationError."""
+    return run(parse(expression))
+
+def evaluate_many(expressions):
+    """Evaluate several expressions; failures are returned in place as CalculationError."""
+    results = []
+    for expression in expressions:
+        try:
+            results.append(evaluate(expression))
+        except CalculationError as e:
+            results.append(e)
+    return results
@@ -0,0 +1,208 @@
+"""
+Speculative final answer for RequirementAgents.
+
+Requirements such as force_after=Tool or min_invocations keep an agent calling ThinkTool
+and Wikipedia even after a search came back empty and the answer will come from the
+model's own knowledge anyway. The final answer is then written only after all of those
+steps, as one more LLM round-trip with the longest prompt of the run.
+
+SpeculativeAnswerMiddleware watches each finished step. When a step's tool calls all
+returned nothing useful (empty output, an error or a few characters), it starts writing
+the final answer in the background while the agent carries on with its required steps,
+which run exactly as before. If one of them changes the plan (new tool information, or
+a thought that names another tool to try), the draft is discarded. At the first step
+where the requirements let the agent stop and force no other tool, that step becomes the
+final answer and is served the draft instead of a fresh model call. The draft was produced
+while the required steps ran, so the answer costs no extra round-trip. The bet is that a
+model which got nothing useful would answer there rather than make further optional tool
+calls; required steps are never skipped.
+
+The draft is handed over through the chat model's cache (DraftAnswerCache wraps it), so
+the agent still runs its own final_answer tool call and every requirement still applies.
+The middleware must be given the agent's own llm.
+
+    middlewares=[SpeculativeAnswerMiddleware(llm)]
+
+Set SPECULATIVE_ANSWER=0 to switch the mode off without editing the agents.
+"""
+import asyncio
+import os
+from beeai_framework.agents.experimental.events import RequirementAgentStartEvent, RequirementAgentSuccessEvent
+from beeai_framework.backend import AssistantMessage, UserMessage
+from beeai_framework.backend.message import MessageToolCallContent
+from beeai_framework.backend.types import ChatModelOutput
+from beeai_framework.cache import BaseCache
+from beeai_framework.context import RunMiddlewareProtocol
+from beeai_framework.tools import Tool
+from beeai_framework.utils.strings import to_json
+
+# A tool result shorter than this carries no usable information
+MIN_USEFUL_RESULT_CHARS = 40
+
+# Tools that do not fetch information, so they never make a step low-value or informative
+NON_INFORMATIVE_TOOLS = {"think", "final_answer"}
+
+SPECULATIVE_PROMPT = (
+    "The tools did not return useful information for this task. Write the final answer to the "
+    "original task now, based on the conversation and your own knowledge. Reply with the answer only."
+)
+
+def speculative_mode_enabled():
+    return os.getenv("SPECULATIVE_ANSWER", "1").lower() not in ("0", "false", "no")
+
+def is_low_value(step, min_chars=MIN_USEFUL_RESULT_CHARS):
+    if step.error is not None or step.output.is_empty():
+        return True
+    return len(step.output.get_text_content().strip()) < min_chars
+
+class DraftAnswerCache(BaseCache):
+    """Chat model cache that serves one prepared response to the next lookup, then defers to the wrapped cache."""
+
+    def __init__(self, inner):
+        super().__init__()
+        self.inner = inner
+        self.draft = None
+
+    @property
+    def enabled(self):
+        return True
+
+    async def size(self):
+        return await self.inner.size()
+
+    async def set(self, key, value):
+        await self.inner.set(key, value)
+
+    async def get(self, key):
+        if self.draft is not None:
+            draft, self.draft = self.draft, None
+            return [draft]
+        return await self.inner.get(key)
+
+    async def has(self, key):
+        return self.draft is not None or await self.inner.has(key)
+
+    async def delete(self, key):
+        return await self.inner.delete(key)
+
+    async def clear(self):
+        self.draft = None
+        await self.inner.clear()
+
+    async def clone(self):
+        return DraftAnswerCache(await self.inner.clone())
+
+class SpeculativeAnswerMiddleware(RunMiddlewareProtocol):
+    def __init__(self, llm, *, enabled=None, min_result_chars=MIN_USEFUL_RESULT_CHARS, verbose=True):
+        self.llm = llm
+        self.enabled = enabled
+        self.min_result_chars = min_result_chars
+        self.verbose = verbose
+        self.report = {}
+        self._task = None
+        self._cleanups = []
+
+    def bind(self, ctx):
+        for cleanup in self._cleanups:
+            cleanup()
+        self._cleanups = []
+        self._discard()
+        self.report = {"speculated_at": None, "accepted_at": None, "discarded": 0}
+        if not (self.enabled if self.enabled is not None else speculative_mode_enabled()):
+            return
+        if not isinstance(self.llm.cache, DraftAnswerCache):
+            self.llm.cache = DraftAnswerCache(self.llm.cache)
+        self._tool_names = {tool.name for tool in ctx.instance.meta.tools} - NON_INFORMATIVE_TOOLS
+        self._cleanups = [
+            ctx.emitter.on("start", self._on_start),
+            ctx.emitter.on("success", self._on_success),
+        ]
+
+    async def _on_start(self, data, event):
+        if not isinstance(data, RequirementAgentStartEvent) or self._task is None:
+            return
+        request = data.request
+        forced = request.tool_choice if isinstance(request.tool_choice, Tool) else None
+        if not request.can_stop or (forced is not None and forced is not request.final_answer):
+            # A requirement still holds the agent back; that step runs normally
+            return
+        if request.final_answer not in request.allowed_tools or request.final_answer.custom_schema:
+            self._discard()
+            return
+        await self._accept(data.state, request.final_answer)
+
+    async def _on_success(self, data, event):
+        if not isinstance(data, RequirementAgentSuccessEvent):
+            return
+        state = data.state
+        steps = [step for step in state.steps if step.iteration == state.iteration]
+
+        # A draft that was not picked up must not answer some later call to the model
+        self.llm.cache.draft = None
+        if state.answer is not None:
+            self._discard()
+            return
+
+        if self._task is not None and self._changes_plan(steps):
+            self._discard()
+            self.report["discarded"] += 1
+            if self.verbose:
+                print(f"⚡ Step {state.iteration} changed the plan; speculative answer discarded")
+
+        if self._task is None and self._low_value(steps):
+            self.report["speculated_at"] = state.iteration
+            self._task = asyncio.create_task(self._speculate(list(state.memory.messages)))
+            if self.verbose:
+                print(f"⚡ Step {state.iteration} returned no useful tool results; drafting the final answer in the background")
+
+    async def _speculate(self, messages):
+        output = await self.llm.create(messages=[*messages, UserMessage(SPECULATIVE_PROMPT)])
+        return output.get_text_content()
+
+    async def _accept(self, state, final_answer):
+        task, self._task = self._task, None
+        try:
+            text = await task
+        except Exception as e:
+            self.report["discarded"] += 1
+            if self.verbose:
+                print(f"⚡ Speculative answer failed ({type(e).__name__}); continuing normally")
+            return
+        if not text.strip():
+            self.report["discarded"] += 1
+            return
+
+        call = MessageToolCallContent(
+            id=f"call_speculative_{state.iteration}",
+            tool_name=final_answer.name,
+            args=to_json({"response": text}, sort_keys=False),
+        )
+        self.llm.cache.draft = ChatModelOutput(messages=[AssistantMessage(call)], finish_reason="tool_calls")
+        self.report["accepted_at"] = state.iteration
+        if self.verbose:
+            print(f"⚡ Requirements satisfied at step {state.iteration}; the final answer uses the draft "
+                  f"started after step {self.report['speculated_at']}")
+
+    def _discard(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _low_value(self, steps):
+        tool_steps = [step for step in steps if step.tool is not None and step.tool.name not in NON_INFORMATIVE_TOOLS]
+        return bool(tool_steps) and all(is_low_value(step, self.min_result_chars) for step in tool_steps)
+
+    def _changes_plan(self, steps):
+        for step in steps:
+            if step.tool is None:
+                continue
+            if step.tool.name not in NON_INFORMATIVE_TOOLS:
+                # New information arrived, so the drafted answer may be out of date
+                if not is_low_value(step, self.min_result_chars):
+                    return True
+            elif step.tool.name == "think":
+                # A thought that plans another tool call means the agent is not done
+                thought = to_json(step.input)
+                if any(name in thought for name in self._tool_names):
+                    return True
+        return False
@@ -3,11 +3,13 @@ import logging
 from beeai_framework.agents.experimental import RequirementAgent
 from beeai_framework.agents.experimental.requirements.conditional import ConditionalRequirement
 from beeai_framework.agents.experimental.requirements.ask_permission import AskPermissionRequirement
-from beeai_framework.memory import UnconstrainedMemory
+from bounded_memory import BoundedMemory, MemoryBudgetMiddleware
+from tool_cache import CachedWikipediaTool
 from beeai_framework.backend import ChatModel, ChatModelParameters
 from beeai_framework.tools.think import ThinkTool
 from beeai_framework.tools.search.wikipedia import WikipediaTool
-from beeai_framework.middleware.trajectory import GlobalTrajectoryMiddleware
+from trajectory_metrics import TrajectoryMetricsMiddleware
+from approvals import approval_handler
 from beeai_framework.tools import Tool
 
 async def production_security_example():
@@ -28,13 +30,16 @@ Your methodology:
 3. Provide comprehensive risk assessment with actionable recommendations
 4. Focus on practical, implementable security measures"""
     
+    # Console prompt by default; APPROVAL_POLICY_FILE / APPROVAL_SERVER_PORT switch to non-blocking approvals
+    approval_provider = approval_handler()
+
     # Production-grade RequirementAgent with security approval
     secure_agent = RequirementAgent(
         llm=llm,
-        tools=[ThinkTool(), WikipediaTool()],
-        memory=UnconstrainedMemory(),
+        tools=[ThinkTool(), CachedWikipediaTool()],
+        memory=BoundedMemory(),
         instructions=SYSTEM_INSTRUCTIONS,
-        middlewares=[GlobalTrajectoryMiddleware(included=[Tool])],
+        middlewares=[TrajectoryMetricsMiddleware(included=[Tool]), MemoryBudgetMiddleware()],
         
         requirements=[
             # Same systematic thinking requirement
@@ -48,6 +53,7 @@ Your methodology:
             # SECURITY: Permission required for external access
             AskPermissionRequirement(
                 WikipediaTool,
+                handler=approval_provider,
             ),
             # Same control after permission granted
             ConditionalRequirement(
@@ -65,6 +71,8 @@ Your methodology:
     
     result = await secure_agent.run(ANALYSIS_QUERY)
     print(f"\n🛡️ Security-Approved Analysis:\n{result.answer.text}")
+    if approval_provider:
+        approval_provider.stats.print_summary()
 
 async def main() -> None:
     logging.getLogger('asyncio').setLevel(logging.CRITICAL)
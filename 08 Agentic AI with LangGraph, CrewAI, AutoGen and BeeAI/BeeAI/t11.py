@@ -1,25 +1,29 @@
 import asyncio
 import logging
 from beeai_framework.agents.experimental import RequirementAgent
-from beeai_framework.memory import UnconstrainedMemory
+from bounded_memory import BoundedMemory, MemoryBudgetMiddleware
 from beeai_framework.tools import StringToolOutput, Tool, ToolRunOptions
 from beeai_framework.context import RunContext
 from beeai_framework.emitter import Emitter
 from beeai_framework.backend import ChatModel, ChatModelParameters
-from beeai_framework.middleware.trajectory import GlobalTrajectoryMiddleware
+from trajectory_metrics import TrajectoryMetricsMiddleware
+from safe_arithmetic import CalculationError, evaluate, evaluate_many
 from pydantic import BaseModel, Field
 from typing import Any
 
 # === REAL TOOL CREATION WITH OFFICIAL BEEAI TOOLS ===
 
+MAX_BATCH_SIZE = 100
+
 class CalculatorInput(BaseModel):
     """Input model for basic mathematical calculations."""
-    expression: str = Field(description="Mathematical expression using +, -, *, / (e.g., '10 + 5', '20 - 8', '4 * 6', '15 / 3')")
+    expression: str = Field(default="", description="Mathematical expression using +, -, *, / (e.g., '10 + 5', '20 - 8', '4 * 6', '15 / 3')")
+    expressions: list[str] = Field(default_factory=list, description="Several expressions to evaluate in one call (e.g., ['10 + 5', '4 * 6'])")
 
 class SimpleCalculatorTool(Tool[CalculatorInput, ToolRunOptions, StringToolOutput]):
     """A simple calculator tool for basic arithmetic operations: add, subtract, multiply, divide."""
     name = "SimpleCalculator"
-    description = "Performs basic arithmetic calculations: addition (+), subtraction (-), multiplication (*), and division (/)."
+    description = "Performs basic arithmetic calculations: addition (+), subtraction (-), multiplication (*), and division (/). Pass several expressions at once to evaluate them in a single call."
     input_schema = CalculatorInput
 
     def __init__(self, options: dict[str, Any] | None = None) -> None:
@@ -32,30 +36,46 @@ class SimpleCalculatorTool(Tool[CalculatorInput, ToolRunOptions, StringToolOutpu
         )
 
     def _safe_calculate(self, expression: str) -> float:
-        """Safely evaluate basic arithmetic expressions."""
-        # Remove spaces for processing
-        expr = expression.replace(' ', '')
-        
-        # Only allow numbers, basic operators, parentheses, and decimal points
-        allowed_chars = set('0123456789+-*/().')
-        if not all(c in allowed_chars for c in expr):
-            raise ValueError("Only numbers and basic operators (+, -, *, /, parentheses) are allowed")
-        
-        try:
-            # Use eval with restricted environment for basic arithmetic only
-            result = eval(expr, {"__builtins__": {}}, {})
-            return float(result)
-        except ZeroDivisionError:
-            raise ValueError("Division by zero is not allowed")
-        except Exception as e:
-            raise ValueError(f"Invalid arithmetic expression: {str(e)}")
+        """Safely evaluate basic arithmetic expressions (no eval; see safe_arithmetic.py)."""
+        return evaluate(expression.replace(' ', ''))
+
+    @staticmethod
+    def _operation(expression: str) -> str:
+        if '+' in expression:
+            return "Addition"
+        elif '-' in expression:
+            return "Subtraction"
+        elif '*' in expression:
+            return "Multiplication"
+        elif '/' in expression:
+            return "Division"
+        return "Basic Arithmetic"
 
     async def _run(
         self, input: CalculatorInput, options: ToolRunOptions | None, context: RunContext
     ) -> StringToolOutput:
         """Perform basic arithmetic calculations."""
         try:
-            expression = input.expression.strip()
+            expressions = [expression.strip() for expression in input.expressions]
+            if input.expression.strip():
+                expressions.insert(0, input.expression.strip())
+            if not expressions:
+                raise ValueError("Provide an expression or a list of expressions")
+
+            if len(expressions) > 1:
+                # Batch: one tool call, one line per expression; a failing line does not stop the rest
+                if len(expressions) > MAX_BATCH_SIZE:
+                    raise ValueError(f"At most {MAX_BATCH_SIZE} expressions per call")
+                output = f"🧮 Simple Calculator ({len(expressions)} expressions)\n"
+                results = evaluate_many([expression.replace(' ', '') for expression in expressions])
+                for index, (expression, result) in enumerate(zip(expressions, results), 1):
+                    if isinstance(result, CalculationError):
+                        output += f"{index}. {expression} -> ❌ {result}\n"
+                    else:
+                        output += f"{index}. {expression} = {result}\n"
+                return StringToolOutput(output.rstrip())
+
+            expression = expressions[0]
             
             # Perform calculation
             result = self._safe_calculate(expression)
@@ -66,16 +86,7 @@ class SimpleCalculatorTool(Tool[CalculatorInput, ToolRunOptions, StringToolOutpu
             output += f"Result: {result}\n"
             
             # Add operation type hint
-            if '+' in expression:
-                output += "Operation: Addition"
-            elif '-' in expression:
-                output += "Operation: Subtraction"
-            elif '*' in expression:
-                output += "Operation: Multiplication"
-            elif '/' in expression:
-                output += "Operation: Division"
-            else:
-                output += "Operation: Basic Arithmetic"
+            output += f"Operation: {self._operation(expression)}"
             
             return StringToolOutput(output)
             
@@ -93,11 +104,11 @@ async def calculator_agent_example():
     calculator_agent = RequirementAgent(
         llm=llm,
         tools=[SimpleCalculatorTool()],
-        memory=UnconstrainedMemory(),
+        memory=BoundedMemory(),
         instructions="""You are a helpful math assistant. When users ask for calculations, 
         use the SimpleCalculator tool to provide accurate results. 
         Always show both the expression and the calculated result.""",
-        middlewares=[GlobalTrajectoryMiddleware(included=[Tool])],
+        middlewares=[TrajectoryMetricsMiddleware(included=[Tool]), MemoryBudgetMiddleware()],
     )
     
     # Interactive examples - simulating human input
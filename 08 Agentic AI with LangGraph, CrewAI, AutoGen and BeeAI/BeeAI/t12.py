@@ -1,18 +1,108 @@
+import argparse
 import asyncio
 import logging
+import time
 from beeai_framework.agents.experimental import RequirementAgent
 from beeai_framework.agents.experimental.requirements.conditional import ConditionalRequirement
 from beeai_framework.agents.experimental.requirements.ask_permission import AskPermissionRequirement
-from beeai_framework.memory import UnconstrainedMemory
+from bounded_memory import BoundedMemory, MemoryBudgetMiddleware
+from tool_cache import CachedOpenMeteoTool, CachedWikipediaTool
 from beeai_framework.backend import ChatModel, ChatModelParameters
 from beeai_framework.tools.search.wikipedia import WikipediaTool
 from beeai_framework.tools.weather import OpenMeteoTool
 from beeai_framework.tools.think import ThinkTool
-from beeai_framework.tools.handoff import HandoffTool
+from beeai_framework.tools.handoff import HandoffSchema, HandoffTool
 from beeai_framework.middleware.trajectory import GlobalTrajectoryMiddleware
-from beeai_framework.tools import Tool
+from trajectory_metrics import TrajectoryMetricsMiddleware
+from approvals import approval_handler
+from beeai_framework.tools import StringToolOutput, Tool, ToolError, ToolRunOptions
+from beeai_framework.context import RunContext
+from beeai_framework.emitter import Emitter
+from beeai_framework.memory import BaseMemory
+from beeai_framework.backend import AssistantMessage
 
-async def multi_agent_travel_planner_with_language():
+# Parallel mode: how long each specialist may take before the coordinator continues without it
+SPECIALIST_TIMEOUT_SECONDS = 180
+
+class ParallelHandoffTool(Tool[HandoffSchema, ToolRunOptions, StringToolOutput]):
+    """Delegates one task to several expert agents at once and merges their answers.
+
+    Works like HandoffTool (each expert gets a fresh clone with the coordinator's
+    conversation so far), but the experts run concurrently, so the call takes as long
+    as the slowest expert instead of the sum of all of them. An expert that times out
+    or fails is reported as unavailable and the others' answers are still returned.
+    """
+
+    def __init__(self, targets, *, name, description, timeout=SPECIALIST_TIMEOUT_SECONDS):
+        super().__init__()
+        self._targets = targets  # section title -> agent
+        self._name = name
+        self._description = description
+        self.timeout = timeout
+        self.last_timings = {}
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def description(self):
+        return self._description
+
+    @property
+    def input_schema(self):
+        return HandoffSchema
+
+    def _create_emitter(self):
+        return Emitter.root().child(
+            namespace=["tool", "parallel_handoff"],
+            creator=self,
+        )
+
+    async def _run(self, input: HandoffSchema, options: ToolRunOptions | None, context: RunContext) -> StringToolOutput:
+        memory = context.context["state"]["memory"]
+        if not memory or not isinstance(memory, BaseMemory):
+            raise ToolError("No memory found in context.")
+
+        # Same history as HandoffTool: drop the coordinator's pending tool call
+        messages = memory.messages
+        if messages and isinstance(messages[-1], AssistantMessage) and messages[-1].get_tool_calls():
+            messages = messages[:-1]
+
+        results = await asyncio.gather(
+            *(self._consult(title, agent, messages, input.task) for title, agent in self._targets.items())
+        )
+        self.last_timings = {title: (status, seconds) for title, status, _, seconds in results}
+
+        if all(status != "ok" for _, status, _, _ in results):
+            raise ToolError("No specialist answered: " + ", ".join(f"{title} ({status})" for title, status, _, _ in results))
+
+        sections = []
+        for title, status, text, seconds in results:
+            if status == "ok":
+                sections.append(f"## {title}\n{text}")
+            else:
+                sections.append(f"## {title}\n(Unavailable: {text}. Cover this area from general knowledge and say so.)")
+        return StringToolOutput("\n\n".join(sections))
+
+    async def _consult(self, title, agent, messages, task):
+        start_time = time.time()
+
+        async def run_specialist():
+            target = await agent.clone()
+            target.memory.reset()
+            await target.memory.add_many(messages)
+            return await target.run(prompt=task)
+
+        try:
+            response = await asyncio.wait_for(run_specialist(), self.timeout)
+            return title, "ok", response.result.text, time.time() - start_time
+        except asyncio.TimeoutError:
+            return title, "timeout", f"timed out after {self.timeout}s", time.time() - start_time
+        except Exception as e:
+            return title, "error", f"failed with {type(e).__name__}: {e}", time.time() - start_time
+
+async def multi_agent_travel_planner_with_language(mode="sequential"):
     """
     Advanced Multi-Agent Travel Planning System with Language Expert
     
@@ -22,6 +112,9 @@ async def multi_agent_travel_planner_with_language():
     3. Requirements-based execution control
     4. Language and cultural expertise integration
     5. Comprehensive travel planning workflow
+
+    mode="sequential" lets the coordinator hand off to one specialist at a time;
+    mode="parallel" consults all three specialists concurrently in a single step.
     """
     
     # Initialize the language model
@@ -33,8 +126,8 @@ async def multi_agent_travel_planner_with_language():
     # === AGENT 1: DESTINATION RESEARCH EXPERT ===
     destination_expert = RequirementAgent(
         llm=llm,
-        tools=[WikipediaTool(), ThinkTool()],
-        memory=UnconstrainedMemory(),
+        tools=[CachedWikipediaTool(), ThinkTool()],
+        memory=BoundedMemory(),
         instructions="""You are a Destination Research Expert specializing in comprehensive travel destination analysis.
 
         Your expertise:
@@ -44,7 +137,7 @@ async def multi_agent_travel_planner_with_language():
         - Safety considerations and travel advisories
 
         Always provide detailed, factual information with clear source attribution.""",
-        middlewares=[GlobalTrajectoryMiddleware(included=[Tool])],
+        middlewares=[GlobalTrajectoryMiddleware(included=[Tool]), MemoryBudgetMiddleware()],
         requirements=[
             ConditionalRequirement(
                 ThinkTool,
@@ -66,8 +159,8 @@ async def multi_agent_travel_planner_with_language():
     # === AGENT 2: TRAVEL METEOROLOGIST ===
     travel_meteorologist = RequirementAgent(
         llm=llm,
-        tools=[OpenMeteoTool(), ThinkTool()],
-        memory=UnconstrainedMemory(),
+        tools=[CachedOpenMeteoTool(), ThinkTool()],
+        memory=BoundedMemory(),
         instructions="""You are a Travel Meteorologist specializing in weather analysis for travel planning.
 
         Your expertise:
@@ -79,7 +172,7 @@ async def multi_agent_travel_planner_with_language():
         - Weather-related travel risks and precautions
 
         Focus on actionable weather guidance for travelers.""",
-        middlewares=[GlobalTrajectoryMiddleware(included=[Tool])],
+        middlewares=[GlobalTrajectoryMiddleware(included=[Tool]), MemoryBudgetMiddleware()],
         requirements=[
             ConditionalRequirement(
                 ThinkTool,
@@ -99,8 +192,8 @@ async def multi_agent_travel_planner_with_language():
     # === AGENT 3: LANGUAGE & CULTURAL EXPERT ===
     language_and_culture_expert = RequirementAgent(
         llm=llm,
-        tools=[WikipediaTool(), ThinkTool()],
-        memory=UnconstrainedMemory(),
+        tools=[CachedWikipediaTool(), ThinkTool()],
+        memory=BoundedMemory(),
         instructions="""You are a Language & Cultural Expert specializing in linguistic and cultural guidance for travelers.
 
         Your expertise:
@@ -113,7 +206,7 @@ async def multi_agent_travel_planner_with_language():
         - Dining customs, tipping practices, and social interactions
 
         Always emphasize cultural sensitivity and respectful travel practices.""",
-        middlewares=[GlobalTrajectoryMiddleware(included=[Tool])],
+        middlewares=[GlobalTrajectoryMiddleware(included=[Tool]), MemoryBudgetMiddleware()],
         requirements=[
             ConditionalRequirement(
                 ThinkTool,
@@ -143,11 +236,32 @@ async def multi_agent_travel_planner_with_language():
         description="Consult our Language & Cultural Expert for essential phrases, cultural etiquette, and communication guidance for respectful travel."
     )
     
+    if mode == "parallel":
+        specialist_panel = ParallelHandoffTool(
+            {
+                "Destination Research": destination_expert,
+                "Weather Planning": travel_meteorologist,
+                "Language & Cultural Guidance": language_and_culture_expert,
+            },
+            name="SpecialistPanel",
+            description="Consult the Destination Research Expert, Travel Meteorologist and Language & Cultural Expert at the same time. Describe the whole trip in the task; the answer contains one section per expert.",
+        )
+        coordinator_tools = [specialist_panel, ThinkTool()]
+        delegation_step = "Delegate the trip to all expert agents at once using the SpecialistPanel tool"
+        permission_targets = ["SpecialistPanel"]
+    else:
+        coordinator_tools = [handoff_to_destination, handoff_to_weather, handoff_to_language, ThinkTool()]
+        delegation_step = "Delegate specific queries to appropriate expert agents using handoff tools"
+        permission_targets = ["DestinationResearch", "WeatherPlanning", "LanguageCulturalGuidance"]
+
+    # Console prompt by default; APPROVAL_POLICY_FILE / APPROVAL_SERVER_PORT switch to non-blocking approvals
+    approval_provider = approval_handler()
+
     travel_coordinator = RequirementAgent(
         llm=llm,
-        tools=[handoff_to_destination, handoff_to_weather, handoff_to_language, ThinkTool()],
-        memory=UnconstrainedMemory(),
-        instructions="""You are the Travel Coordinator, the main interface for comprehensive travel planning.
+        tools=coordinator_tools,
+        memory=BoundedMemory(),
+        instructions=f"""You are the Travel Coordinator, the main interface for comprehensive travel planning.
 
         Your role:
         - Understand traveler requirements and preferences
@@ -163,16 +277,16 @@ async def multi_agent_travel_planner_with_language():
 
         Coordination Process:
         1. Think about what information is needed for comprehensive travel planning
-        2. Delegate specific queries to appropriate expert agents using handoff tools
+        2. {delegation_step}
         3. Gather insights from multiple specialists
         4. Synthesize information into cohesive travel recommendations
         5. Provide a complete travel planning summary
 
         Always ensure travelers receive well-rounded guidance covering destinations and landmarks, weather, and cultural considerations.""",
-        middlewares=[GlobalTrajectoryMiddleware(included=[Tool])],
+        middlewares=[TrajectoryMetricsMiddleware(included=[Tool]), MemoryBudgetMiddleware()],
         requirements=[
             ConditionalRequirement(ThinkTool, consecutive_allowed=False),
-            AskPermissionRequirement(["DestinationResearch", "WeatherPlanning", "LanguageCulturalGuidance"])
+            AskPermissionRequirement(permission_targets, handler=approval_provider)
         ]
     )
     
@@ -182,12 +296,24 @@ async def multi_agent_travel_planner_with_language():
     I speak only English and want to be respectful of Japanese customs. 
     What should I know about the destination, weather expectations, and language/cultural tips?"""
     
+    start_time = time.time()
     result = await travel_coordinator.run(query)
     print(f"\n📋 Comprehensive Travel Plan:\n{result.answer.text}")
 
+    print(f"\n⏱️ {mode.capitalize()} mode: {time.time() - start_time:.1f}s end-to-end")
+    if approval_provider:
+        approval_provider.stats.print_summary()
+    if mode == "parallel":
+        for title, (status, seconds) in specialist_panel.last_timings.items():
+            print(f"   {title}: {status} in {seconds:.1f}s")
+
 async def main() -> None:
     logging.getLogger('asyncio').setLevel(logging.CRITICAL)
-    await multi_agent_travel_planner_with_language()
+    parser = argparse.ArgumentParser(description="Multi-agent travel planner")
+    parser.add_argument("--mode", choices=["sequential", "parallel"], default="sequential",
+                        help="Hand off to specialists one at a time, or consult all of them concurrently")
+    args = parser.parse_args()
+    await multi_agent_travel_planner_with_language(args.mode)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,23 +1,69 @@
 import asyncio
 import logging
-import string
+import re
+import time
 from beeai_framework.backend import ChatModel, ChatModelParameters, UserMessage
 
+# Batch evaluation settings
+MAX_CONCURRENCY = 4  # Maximum number of llm.create calls in flight at once
+ITEM_TIMEOUT_SECONDS = 120  # Per-scenario limit for the model call
+
 class SimplePromptTemplate:
-    """Simple prompt template using Python string formatting."""
+    """Mustache-style {{variable}} prompt template, compiled once and rendered with a single join."""
+    
+    # {{name}} or {{ name }}; any other brace is literal text
+    PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
     
     def __init__(self, template: str):
         self.template = template
+        # split() alternates literal text and variable names: [text, name, text, name, ..., text]
+        parts = self.PLACEHOLDER.split(template)
+        self._segments = parts
+        self._slots = tuple(zip(range(1, len(parts), 2), parts[1::2]))
+        self.variables = frozenset(parts[1::2])
     
     def render(self, variables: dict) -> str:
         """Render the template with provided variables."""
-        # Replace mustache-style {{variable}} with Python format {variable}
-        formatted_template = self.template
-        for key, value in variables.items():
-            formatted_template = formatted_template.replace(f"{{{{{key}}}}}", f"{{{key}}}")
+        # Report every missing variable at once, before doing any work
+        missing = self.variables.difference(variables)
+        if missing:
+            raise ValueError(f"Missing template variables: {', '.join(sorted(missing))}")
         
-        # Format the template with the variables
-        return formatted_template.format(**variables)
+        segments = self._segments.copy()
+        for index, name in self._slots:
+            segments[index] = str(variables[name])
+        return "".join(segments)
+
+async def evaluate_scenarios(llm, prompt_template, scenarios, max_concurrency=MAX_CONCURRENCY, timeout=ITEM_TIMEOUT_SECONDS):
+    """Evaluate all scenarios concurrently and yield each result as soon as it finishes."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    finished = asyncio.Queue()
+
+    async def evaluate(index, scenario):
+        start_time = time.perf_counter()
+        result = {"index": index, "scenario": scenario, "prompt": None, "response": None, "error": None}
+        try:
+            result["prompt"] = prompt_template.render(scenario)
+            async with semaphore:
+                response = await asyncio.wait_for(llm.create(messages=[UserMessage(content=result["prompt"])]), timeout)
+            result["response"] = response.get_text_content()
+        except asyncio.TimeoutError:
+            result["error"] = f"Timed out after {timeout}s"
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            # Every scenario yields exactly one result, or the consumer below would wait forever
+            result["seconds"] = time.perf_counter() - start_time
+            finished.put_nowait(result)
+
+    # gather() runs every evaluation; the queue hands results back in completion order
+    evaluations = asyncio.gather(*(evaluate(index, scenario) for index, scenario in enumerate(scenarios, 1)))
+    try:
+        for _ in scenarios:
+            yield await finished.get()
+        await evaluations
+    finally:
+        evaluations.cancel()
 
 async def prompt_template_example():
     llm = ChatModel.from_name("watsonx:ibm/granite-3-3-8b-instruct", ChatModelParameters(temperature=0))
@@ -64,20 +110,19 @@ async def prompt_template_example():
         }
     ]
     
-    for i, scenario in enumerate(project_scenarios, 1):
-        print(f"\n=== Project Evaluation {i}: {scenario['project_name']} ===")
+    # Evaluate all scenarios concurrently; each one prints as soon as its evaluation finishes
+    async for result in evaluate_scenarios(llm, prompt_template, project_scenarios):
+        print(f"\n=== Project Evaluation {result['index']}: {result['scenario']['project_name']} ===")
         
-        # Render the template with scenario data
-        rendered_prompt = prompt_template.render(scenario)
         print("\n  Rendered prompt:")
-        print(rendered_prompt)
+        print(result["prompt"])
         
-        # Generate evaluation using create() method
-        messages = [UserMessage(content=rendered_prompt)]
-        response = await llm.create(messages=messages)
+        if result["error"]:
+            print(f"### Evaluation failed after {result['seconds']:.1f}s: {result['error']} ###")
+            continue
         
         print("### LLM response: ###\n")
-        print(response.get_text_content())
+        print(result["response"])
         
 async def main() -> None:
     logging.getLogger('asyncio').setLevel(logging.CRITICAL) # Suppress unwanted warnings
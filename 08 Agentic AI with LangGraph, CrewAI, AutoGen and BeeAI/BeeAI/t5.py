@@ -1,7 +1,7 @@
 import asyncio
 import logging
 from beeai_framework.agents.experimental import RequirementAgent
-from beeai_framework.memory import UnconstrainedMemory
+from bounded_memory import BoundedMemory, MemoryBudgetMiddleware
 from beeai_framework.backend import ChatModel, ChatModelParameters
 
 async def minimal_tracked_agent_example():
@@ -23,8 +23,9 @@ Your methodology:
     minimal_agent = RequirementAgent(
         llm=llm,
         tools=[],  # No tools yet
-        memory=UnconstrainedMemory(),
-        instructions=SYSTEM_INSTRUCTIONS
+        memory=BoundedMemory(),
+        instructions=SYSTEM_INSTRUCTIONS,
+        middlewares=[MemoryBudgetMiddleware()]
     )
     
     # CONSISTENT QUERY (used in all examples)
@@ -2,10 +2,11 @@ import asyncio
 import logging
 from beeai_framework.agents.experimental import RequirementAgent
 from beeai_framework.agents.experimental.requirements.conditional import ConditionalRequirement
-from beeai_framework.memory import UnconstrainedMemory
+from bounded_memory import BoundedMemory, MemoryBudgetMiddleware
+from tool_cache import CachedWikipediaTool
 from beeai_framework.backend import ChatModel, ChatModelParameters
 from beeai_framework.tools.search.wikipedia import WikipediaTool
-from beeai_framework.middleware.trajectory import GlobalTrajectoryMiddleware
+from trajectory_metrics import TrajectoryMetricsMiddleware
 from beeai_framework.tools import Tool
 
 async def wikipedia_enhanced_agent_example():
@@ -30,10 +31,10 @@ Your methodology:
     # RequirementAgent with Wikipedia research capability
     wikipedia_agent = RequirementAgent(
         llm=llm,
-        tools=[WikipediaTool()],  # Added research capability
-        memory=UnconstrainedMemory(),
+        tools=[CachedWikipediaTool()],  # Added research capability
+        memory=BoundedMemory(),
         instructions=SYSTEM_INSTRUCTIONS,
-        middlewares=[GlobalTrajectoryMiddleware(included=[Tool])],
+        middlewares=[TrajectoryMetricsMiddleware(included=[Tool]), MemoryBudgetMiddleware()],
         requirements=[ConditionalRequirement(WikipediaTool, max_invocations=2)]
     )
     
@@ -2,11 +2,12 @@ import asyncio
 import logging
 from beeai_framework.agents.experimental import RequirementAgent
 from beeai_framework.agents.experimental.requirements.conditional import ConditionalRequirement
-from beeai_framework.memory import UnconstrainedMemory
+from bounded_memory import BoundedMemory, MemoryBudgetMiddleware
+from tool_cache import CachedWikipediaTool
 from beeai_framework.backend import ChatModel, ChatModelParameters
 from beeai_framework.tools.think import ThinkTool
 from beeai_framework.tools.search.wikipedia import WikipediaTool
-from beeai_framework.middleware.trajectory import GlobalTrajectoryMiddleware
+from trajectory_metrics import TrajectoryMetricsMiddleware
 from beeai_framework.tools import Tool
 
 async def reasoning_enhanced_agent_example():
@@ -30,10 +31,10 @@ Your methodology:
     # RequirementAgent with reasoning + research capability
     reasoning_agent = RequirementAgent(
         llm=llm,
-        tools=[ThinkTool(), WikipediaTool()],  # Thinking + Research
-        memory=UnconstrainedMemory(),
+        tools=[ThinkTool(), CachedWikipediaTool()],  # Thinking + Research
+        memory=BoundedMemory(),
         instructions=SYSTEM_INSTRUCTIONS,
-        middlewares=[GlobalTrajectoryMiddleware(included=[Tool])],
+        middlewares=[TrajectoryMetricsMiddleware(included=[Tool]), MemoryBudgetMiddleware()],
         requirements=[
             ConditionalRequirement(ThinkTool, max_invocations=2),
             ConditionalRequirement(WikipediaTool, max_invocations=2)
@@ -2,11 +2,13 @@ import asyncio
 import logging
 from beeai_framework.agents.experimental import RequirementAgent
 from beeai_framework.agents.experimental.requirements.conditional import ConditionalRequirement
-from beeai_framework.memory import UnconstrainedMemory
+from bounded_memory import BoundedMemory, MemoryBudgetMiddleware
+from tool_cache import CachedWikipediaTool
 from beeai_framework.backend import ChatModel, ChatModelParameters
 from beeai_framework.tools.think import ThinkTool
 from beeai_framework.tools.search.wikipedia import WikipediaTool
-from beeai_framework.middleware.trajectory import GlobalTrajectoryMiddleware
+from trajectory_metrics import TrajectoryMetricsMiddleware
+from speculative_answer import SpeculativeAnswerMiddleware
 from beeai_framework.tools import Tool
 
 async def controlled_execution_example():
@@ -30,10 +32,10 @@ Your methodology:
     # RequirementAgent with strict execution control
     controlled_agent = RequirementAgent(
         llm=llm,
-        tools=[ThinkTool(), WikipediaTool()],
-        memory=UnconstrainedMemory(),
+        tools=[ThinkTool(), CachedWikipediaTool()],
+        memory=BoundedMemory(),
         instructions=SYSTEM_INSTRUCTIONS,
-        middlewares=[GlobalTrajectoryMiddleware(included=[Tool])],
+        middlewares=[TrajectoryMetricsMiddleware(included=[Tool]), MemoryBudgetMiddleware(), SpeculativeAnswerMiddleware(llm)],
         
         # REQUIREMENTS: Declarative control over execution flow
         requirements=[
@@ -0,0 +1,88 @@
+import timeit
+from t3 import SimplePromptTemplate
+
+# Benchmark: compiled SimplePromptTemplate (t3.py) vs the previous implementation,
+# which rewrote {{var}} to {var} with str.replace for every variable on every render
+# and then called str.format. Run with: python template_benchmark.py
+
+ITERATIONS = 100000
+
+class LegacyPromptTemplate:
+    """The previous SimplePromptTemplate.render, kept here for comparison."""
+
+    def __init__(self, template: str):
+        self.template = template
+
+    def render(self, variables: dict) -> str:
+        formatted_template = self.template
+        for key, value in variables.items():
+            formatted_template = formatted_template.replace(f"{{{{{key}}}}}", f"{{{key}}}")
+        return formatted_template.format(**variables)
+
+# The project evaluation template from t3.py
+TEMPLATE = """
+    You are a senior data scientist evaluating a machine learning project proposal.
+
+    Project Details:
+    - Project Name: {{project_name}}
+    - Business Problem: {{business_problem}}
+    - Available Data: {{data_description}}
+    - Timeline: {{timeline}}
+    - Success Metrics: {{success_metrics}}
+
+    Please provide:
+    1. Feasibility assessment (1-10 scale)
+    2. Key technical challenges
+    3. Recommended approach
+    4. Risk mitigation strategies
+    5. Expected outcomes
+
+    Be specific and actionable in your recommendations.
+    """
+
+VARIABLES = {
+    "project_name": "Smart Inventory Optimization",
+    "business_problem": "Reduce inventory costs while maintaining 95% product availability",
+    "data_description": "2 years of sales data, supplier lead times, seasonal patterns, 500K records",
+    "timeline": "3 months development, 1 month testing",
+    "success_metrics": "15% cost reduction, maintain 95% availability, <2% forecast error",
+}
+
+# A larger agent-style prompt: many variables, repeated placeholders and JSON examples with literal braces
+AGENT_TEMPLATE = "\n".join(
+    f"Step {i}: use {{{{tool_{i % 10}}}}} for {{{{task}}}} and reply as {{\"step\": {i}, \"tool\": \"...\"}}"
+    for i in range(50)
+)
+AGENT_VARIABLES = {**{f"tool_{i}": f"Tool{i}" for i in range(10)}, "task": "trip planning"}
+
+def benchmark(name, template, variables):
+    legacy = LegacyPromptTemplate(template)
+    compiled = SimplePromptTemplate(template)
+
+    try:
+        expected = legacy.render(variables)
+        assert compiled.render(variables) == expected, "Renderings differ"
+        legacy_time = timeit.timeit(lambda: legacy.render(variables), number=ITERATIONS) / ITERATIONS
+        legacy_result = f"{legacy_time * 1e6:8.2f} us"
+    except (KeyError, ValueError, IndexError) as e:
+        # str.format chokes on literal braces the compiled template treats as text
+        legacy_time = None
+        legacy_result = f"fails ({type(e).__name__})"
+
+    compiled_time = timeit.timeit(lambda: compiled.render(variables), number=ITERATIONS) / ITERATIONS
+    speedup = f"{legacy_time / compiled_time:5.1f}x" if legacy_time else "    -"
+    print(f"{name:22} legacy: {legacy_result:>16}   compiled: {compiled_time * 1e6:8.2f} us   speedup: {speedup}")
+
+if __name__ == "__main__":
+    print(f"Template rendering ({ITERATIONS} renders each)")
+    print("-" * 90)
+    benchmark("Project evaluation", TEMPLATE, VARIABLES)
+    benchmark("Agent prompt (braces)", AGENT_TEMPLATE, AGENT_VARIABLES)
+
+    compile_time = timeit.timeit(lambda: SimplePromptTemplate(TEMPLATE), number=ITERATIONS) / ITERATIONS
+    print(f"\nOne-off compile cost of the project template: {compile_time * 1e6:.2f} us")
+
+    try:
+        SimplePromptTemplate(TEMPLATE).render({"project_name": "Only a name"})
+    except ValueError as e:
+        print(f"Missing variables are reported up front: {e}")
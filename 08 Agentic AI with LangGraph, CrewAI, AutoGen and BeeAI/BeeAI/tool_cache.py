@@ -0,0 +1,136 @@
+"""
+On-disk cache for BeeAI tool results.
+
+The agents look up the same Wikipedia pages and weather locations run after run. The
+cached tools below store every result in a SQLite file, keyed on the tool name and the
+validated tool input, and return it again until the tool's TTL expires.
+
+    CachedWikipediaTool()      # drop-in for WikipediaTool (requirements still match it)
+    CachedOpenMeteoTool()      # drop-in for OpenMeteoTool
+
+Environment:
+    TOOL_CACHE_PATH     SQLite file (default: tool_cache.sqlite)
+    TOOL_CACHE_OFFLINE  set to 1 for replay mode: answer only from the cache and fail
+                        on a miss instead of going to the network
+"""
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from beeai_framework.tools import ToolError
+from beeai_framework.tools.search.wikipedia import WikipediaTool
+from beeai_framework.tools.weather import OpenMeteoTool
+
+DEFAULT_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", "tool_cache.sqlite")
+
+# How long a result stays fresh, per tool; encyclopedia pages change slowly, forecasts do not
+TOOL_TTL_SECONDS = {
+    "Wikipedia": 7 * 24 * 3600,
+    "OpenMeteoTool": 30 * 60,
+}
+
+def is_offline():
+    return os.getenv("TOOL_CACHE_OFFLINE", "").lower() in ("1", "true", "yes")
+
+class ToolResultCache:
+    """SQLite store of pickled tool outputs with a per-entry timestamp."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_results ("
+            "tool TEXT NOT NULL, key TEXT NOT NULL, input TEXT NOT NULL, output BLOB NOT NULL, "
+            "created REAL NOT NULL, PRIMARY KEY (tool, key))"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(input):
+        """Stable key for a validated tool input: defaults filled in, fields sorted."""
+        canonical = json.dumps(input.model_dump(mode="json"), sort_keys=True)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest(), canonical
+
+    def get(self, tool, key, ttl=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output, created FROM tool_results WHERE tool = ? AND key = ?", (tool, key)
+            ).fetchone()
+        # Replay mode serves whatever was recorded, however old
+        if row is None or (ttl is not None and not is_offline() and time.time() - row[1] > ttl):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, tool, key, canonical_input, output):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_results (tool, key, input, output, created) VALUES (?, ?, ?, ?, ?)",
+                (tool, key, canonical_input, pickle.dumps(output), time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self, tool=None):
+        with self._lock:
+            if tool is None:
+                self._conn.execute("DELETE FROM tool_results")
+            else:
+                self._conn.execute("DELETE FROM tool_results WHERE tool = ?", (tool,))
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = dict(self._conn.execute("SELECT tool, COUNT(*) FROM tool_results GROUP BY tool").fetchall())
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+_default_cache = None
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ToolResultCache()
+    return _default_cache
+
+class CachedToolMixin:
+    """Adds the result cache to a Tool subclass; put it before the tool class in the bases.
+
+    Subclassing (rather than wrapping) keeps isinstance() checks working, so
+    ConditionalRequirement(WikipediaTool, ...) still applies to the cached tool.
+    """
+
+    def __init__(self, *args, cache=None, ttl=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.result_cache = cache or default_cache()
+        self.ttl = ttl if ttl is not None else TOOL_TTL_SECONDS.get(self.name)
+
+    async def _run(self, input, options, context):
+        # input is already validated against the tool's input_schema
+        key, canonical = ToolResultCache.key(input)
+        cached = self.result_cache.get(self.name, key, self.ttl)
+        if cached is not None:
+            return cached
+        if is_offline():
+            raise ToolError(f"No cached {self.name} result for {canonical} (TOOL_CACHE_OFFLINE is set)")
+
+        output = await super()._run(input, options, context)
+        self.result_cache.set(self.name, key, canonical, output)
+        return output
+
+    async def clone(self):
+        cloned = await super().clone()
+        cloned.result_cache = self.result_cache
+        cloned.ttl = self.ttl
+        return cloned
+
+class CachedWikipediaTool(CachedToolMixin, WikipediaTool):
+    pass
+
+class CachedOpenMeteoTool(CachedToolMixin, OpenMeteoTool):
+    pass
@@ -0,0 +1,242 @@
+"""
+Structured trajectory spans for RequirementAgent runs.
+
+TrajectoryMetricsMiddleware prints the same -->/<-- trajectory as GlobalTrajectoryMiddleware
+(and takes the same arguments), and also records a span for every run inside the agent:
+LLM calls, tool calls, requirement checks and nested agents. Each span has its start/end
+time, token usage (LLM calls) and input/output payload sizes.
+
+When the agent run finishes:
+- the spans are appended to TRAJECTORY_EXPORT_PATH (default: trajectory_spans.jsonl), one
+  OTLP/JSON ExportTraceServiceRequest per run, so the file can be loaded by OpenTelemetry
+  tooling or replayed into a collector;
+- a latency breakdown is printed: the time spent in LLM calls, tools, requirement checks and
+  the agent loop itself. Each span counts only its own time (nested spans are subtracted),
+  so a handoff tool's share excludes the LLM calls of the agent it hands off to.
+
+Spans are recorded by the middleware's own event handlers, for the target types in span_types
+(LLM calls, tools, requirements and agents by default); included/excluded only filter what
+is printed, as in GlobalTrajectoryMiddleware.
+
+    middlewares=[TrajectoryMetricsMiddleware(included=[Tool])]
+"""
+import json
+import os
+import secrets
+import time
+from beeai_framework.agents import BaseAgent
+from beeai_framework.agents.experimental.requirements.requirement import Requirement
+from beeai_framework.backend import ChatModel
+from beeai_framework.backend.types import ChatModelOutput
+from beeai_framework.context import RunContext
+from beeai_framework.emitter import EmitterOptions
+from beeai_framework.middleware.trajectory import GlobalTrajectoryMiddleware
+from beeai_framework.tools import Tool
+from beeai_framework.utils.strings import to_json
+
+DEFAULT_EXPORT_PATH = os.getenv("TRAJECTORY_EXPORT_PATH", "trajectory_spans.jsonl")
+
+KIND_LABELS = {
+    "llm": "LLM calls",
+    "tool": "Tools",
+    "requirement": "Requirements",
+    "agent": "Agent loop",
+    "other": "Other",
+}
+
+SPAN_TYPES = (ChatModel, Tool, Requirement, BaseAgent)
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+def span_kind(target):
+    if isinstance(target, ChatModel):
+        return "llm"
+    if isinstance(target, Tool):
+        return "tool"
+    if isinstance(target, Requirement):
+        return "requirement"
+    if isinstance(target, BaseAgent):
+        return "agent"
+    return "other"
+
+def payload_size(value):
+    try:
+        return len(to_json(value, sort_keys=False))
+    except Exception:
+        return len(str(value))
+
+def otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def merged_length(intervals):
+    """Total length covered by possibly overlapping (start, end) intervals."""
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+class TrajectoryMetricsMiddleware(GlobalTrajectoryMiddleware):
+    def __init__(self, *, export_path=DEFAULT_EXPORT_PATH, service_name="beeai-agent", summary=True,
+                 span_types=SPAN_TYPES, **kwargs):
+        super().__init__(**kwargs)
+        self.export_path = export_path
+        self.service_name = service_name
+        self.summary = summary
+        self.span_types = tuple(span_types)
+        self.spans = {}
+        self._root_run_id = None
+        self._trace_id = None
+        self._span_cleanups = []
+
+    def bind(self, ctx):
+        super().bind(ctx)
+        for cleanup in self._span_cleanups:
+            cleanup()
+        self.spans = {}
+        self._root_run_id = ctx.run_id
+        self._trace_id = secrets.token_hex(16)
+        self._span_cleanups = [
+            ctx.emitter.match(self._span_event("start"), self._on_span_start, EmitterOptions(match_nested=True)),
+            ctx.emitter.match(self._span_event("finish"), self._on_span_finish, EmitterOptions(match_nested=True)),
+        ]
+
+    def _span_event(self, name):
+        def matches(event):
+            return (event.name == name and bool(event.context.get("internal")) and event.trace is not None
+                    and isinstance(self._target_of(event), self.span_types))
+        return matches
+
+    @staticmethod
+    def _target_of(meta):
+        return meta.creator.instance if isinstance(meta.creator, RunContext) else meta.creator
+
+    def _on_span_start(self, data, meta):
+        self._start_span(data, meta)
+
+    def _on_span_finish(self, data, meta):
+        span = self._finish_span(data, meta)
+        if span is not None and meta.trace.run_id == self._root_run_id:
+            self.export()
+            if self.summary:
+                self.print_breakdown()
+
+    def _start_span(self, data, meta):
+        target = self._target_of(meta)
+        kind = span_kind(target)
+        name = getattr(target, "name", None) if kind in ("tool", "requirement") else None
+        if kind == "agent":
+            name = target.meta.name
+        elif kind == "llm":
+            name = target.model_id
+        self.spans[meta.trace.run_id] = {
+            "span_id": secrets.token_hex(8),
+            "run_id": meta.trace.run_id,
+            "parent_run_id": meta.trace.parent_run_id,
+            "kind": kind,
+            "name": f"{kind} {name or type(target).__name__}",
+            "start": time.time(),
+            "end": None,
+            "attributes": {
+                "beeai.kind": kind,
+                "beeai.class": type(target).__name__,
+                "beeai.input_bytes": payload_size(data.input),
+            },
+            "error": None,
+        }
+
+    def _finish_span(self, data, meta):
+        span = self.spans.get(meta.trace.run_id)
+        if span is None:
+            return None
+        span["end"] = time.time()
+        attributes = span["attributes"]
+        if data.error is not None:
+            span["error"] = str(data.error)
+        else:
+            attributes["beeai.output_bytes"] = payload_size(data.output)
+        if isinstance(data.output, ChatModelOutput) and data.output.usage:
+            attributes["gen_ai.usage.input_tokens"] = data.output.usage.prompt_tokens
+            attributes["gen_ai.usage.output_tokens"] = data.output.usage.completion_tokens
+        return span
+
+    def breakdown(self):
+        """Self time per span kind for the finished spans of the last run."""
+        finished = [span for span in self.spans.values() if span["end"] is not None]
+        children = {}
+        for span in finished:
+            children.setdefault(span["parent_run_id"], []).append(span)
+
+        totals = {kind: {"seconds": 0.0, "count": 0, "tokens": 0} for kind in KIND_LABELS}
+        for span in finished:
+            nested = [(child["start"], child["end"]) for child in children.get(span["run_id"], [])]
+            own_time = max(0.0, span["end"] - span["start"] - merged_length(nested))
+            entry = totals[span["kind"]]
+            entry["seconds"] += own_time
+            entry["count"] += 1
+            entry["tokens"] += (span["attributes"].get("gen_ai.usage.input_tokens", 0)
+                                + span["attributes"].get("gen_ai.usage.output_tokens", 0))
+
+        root = self.spans.get(self._root_run_id)
+        total = root["end"] - root["start"] if root and root["end"] else sum(entry["seconds"] for entry in totals.values())
+        return total, totals
+
+    def print_breakdown(self):
+        total, totals = self.breakdown()
+        tokens = sum(entry["tokens"] for entry in totals.values())
+        print(f"\n📊 Trajectory breakdown: {total:.2f}s total, {totals['llm']['count']} LLM calls, "
+              f"{totals['tool']['count']} tool calls, {totals['requirement']['count']} requirement checks, {tokens} tokens")
+        for kind, label in KIND_LABELS.items():
+            entry = totals[kind]
+            if entry["count"]:
+                share = entry["seconds"] / total * 100 if total else 0.0
+                print(f"   {label:<13} {entry['seconds']:7.2f}s  {share:5.1f}%  ({entry['count']} spans)")
+        if self.export_path:
+            print(f"   Spans appended to {self.export_path}")
+
+    def to_otlp(self):
+        """The spans of the last run as an OTLP/JSON ExportTraceServiceRequest."""
+        span_ids = {run_id: span["span_id"] for run_id, span in self.spans.items()}
+        spans = []
+        for span in self.spans.values():
+            end = span["end"] if span["end"] is not None else time.time()
+            otel_span = {
+                "traceId": self._trace_id,
+                "spanId": span["span_id"],
+                "name": span["name"],
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(int(span["start"] * 1e9)),
+                "endTimeUnixNano": str(int(end * 1e9)),
+                "attributes": [{"key": key, "value": otel_value(value)} for key, value in span["attributes"].items()],
+                "status": {"code": STATUS_ERROR, "message": span["error"]} if span["error"] else {"code": STATUS_OK},
+            }
+            if span["parent_run_id"] in span_ids:
+                otel_span["parentSpanId"] = span_ids[span["parent_run_id"]]
+            spans.append(otel_span)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "beeai.trajectory"}, "spans": spans}],
+            }]
+        }
+
+    def export(self):
+        if not self.export_path:
+            return
+        with open(self.export_path, "a", encoding="utf-8") as export_file:
+            export_file.write(json.dumps(self.to_otlp()) + "\n")
@@ -0,0 +1,545 @@
+# db_maintenance.py
+"""
+Maintenance for the persisted Chroma store used by the CrewAI/agent workflows (./db).
+
+The store is a SQLite catalog (chroma.sqlite3) plus one directory of HNSW files per
+vector segment (header.bin, data_level0.bin, length.bin, link_lists.bin). As agents
+add and delete knowledge, the SQLite file accumulates free pages and the HNSW index
+accumulates deleted-but-still-present elements (tombstones), which slows queries.
+
+This module:
+1. Reports segment sizes, SQLite free-page ratio and HNSW tombstone ratio
+2. Compacts the store into a fresh generation directory (VACUUM + HNSW rebuild)
+3. Publishes the new generation with an atomic symlink swap (./db must be a symlink
+   to a generation; `convert` sets that up once, offline)
+4. Runs the above periodically in a background thread (StoreCompactor)
+
+Clients must open the store with open_store() so compaction can see them:
+- writers hold a shared lock on db.lock; compaction publishes only when it can take
+  that lock exclusively, so no write is lost to a generation that is being replaced;
+- every client holds a shared lease on the generation it opened (db.gen-*.lease) and
+  keeps using that generation until it reopens; old generations are pruned only once
+  no lease is held. Collection IDs change on every compaction, so clients that reopen
+  must look collections up by name.
+
+Usage:
+    python db_maintenance.py report --path ./db
+    python db_maintenance.py convert --path ./db     # once, with no client running
+    python db_maintenance.py compact --path ./db [--force]
+"""
+import argparse
+import fcntl
+import json
+import mmap
+import os
+import shutil
+import sqlite3
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+SQLITE_FILE = "chroma.sqlite3"
+
+# hnswlib header.bin layout as persisted by chroma-hnswlib:
+# version, offsetLevel0, max_elements, cur_element_count, size_data_per_element,
+# label_offset, offsetData, maxlevel, enterpoint_node, maxM, maxM0, M, mult, ef_construction
+HNSW_HEADER_FORMAT = "<iQQQQQQiIQQQdQ"
+HNSW_HEADER_FIELDS = [
+    "version", "offset_level0", "max_elements", "cur_element_count",
+    "size_data_per_element", "label_offset", "offset_data", "max_level",
+    "enterpoint_node", "max_m", "max_m0", "m", "mult", "ef_construction",
+]
+# hnswlib marks a deleted element with bit 0 of the third byte of its level-0 link list header
+HNSW_DELETE_MARK = 0x01
+
+# Operation codes used by chroma's embeddings_queue table
+QUEUE_OPERATIONS = {0: "add", 1: "update", 2: "upsert", 3: "delete"}
+
+GENERATION_PREFIX = ".gen-"
+STAGING_PREFIX = ".compact-"
+WRITER_LOCK_SUFFIX = ".lock"
+LEASE_SUFFIX = ".lease"
+
+
+def _connect_read_only(sqlite_path: str) -> sqlite3.Connection:
+    """Open the catalog read-only so reporting never takes a write lock"""
+    return sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+
+
+def read_hnsw_header(segment_dir: str) -> Optional[Dict[str, Any]]:
+    """Read header.bin of an HNSW segment directory, or None if it has not been flushed yet"""
+    header_path = os.path.join(segment_dir, "header.bin")
+    if not os.path.exists(header_path):
+        return None
+
+    with open(header_path, "rb") as file:
+        raw = file.read(struct.calcsize(HNSW_HEADER_FORMAT))
+    if len(raw) < struct.calcsize(HNSW_HEADER_FORMAT):
+        return None
+
+    return dict(zip(HNSW_HEADER_FIELDS, struct.unpack(HNSW_HEADER_FORMAT, raw)))
+
+
+def count_hnsw_tombstones(segment_dir: str, header: Dict[str, Any]) -> int:
+    """Count elements flagged as deleted in data_level0.bin without loading the index"""
+    data_path = os.path.join(segment_dir, "data_level0.bin")
+    element_count = header["cur_element_count"]
+    element_size = header["size_data_per_element"]
+    if element_count == 0 or not os.path.exists(data_path) or os.path.getsize(data_path) == 0:
+        return 0
+
+    tombstones = 0
+    with open(data_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            limit = min(element_count, len(data) // element_size)
+            for i in range(limit):
+                flag_offset = header["offset_level0"] + i * element_size + 2
+                if data[flag_offset] & HNSW_DELETE_MARK:
+                    tombstones += 1
+    return tombstones
+
+
+def _directory_size(path: str) -> Dict[str, int]:
+    """File sizes (bytes) of every regular file in a directory"""
+    sizes = {}
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            if os.path.isfile(file_path):
+                sizes[name] = os.path.getsize(file_path)
+    return sizes
+
+
+def store_report(db_path: str = "./db") -> Dict[str, Any]:
+    """Report SQLite and per-segment sizes, free-page ratio and tombstone ratios"""
+    sqlite_path = os.path.join(db_path, SQLITE_FILE)
+    if not os.path.exists(sqlite_path):
+        raise FileNotFoundError(f"No Chroma catalog found at {sqlite_path}")
+
+    conn = _connect_read_only(sqlite_path)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        queue_ops = {name: 0 for name in QUEUE_OPERATIONS.values()}
+        for operation, count in conn.execute(
+            "SELECT operation, COUNT(*) FROM embeddings_queue GROUP BY operation"
+        ):
+            queue_ops[QUEUE_OPERATIONS.get(operation, str(operation))] = count
+
+        collections = {
+            collection_id: name
+            for collection_id, name in conn.execute("SELECT id, name FROM collections")
+        }
+        segments = conn.execute("SELECT id, type, scope, collection FROM segments").fetchall()
+        live_counts = dict(conn.execute(
+            "SELECT segment_id, COUNT(*) FROM embeddings GROUP BY segment_id"
+        ).fetchall())
+        latest_seq_id = conn.execute("SELECT MAX(seq_id) FROM embeddings_queue").fetchone()[0]
+    finally:
+        conn.close()
+
+    segment_reports = []
+    for segment_id, segment_type, scope, collection_id in segments:
+        segment = {
+            "segment_id": segment_id,
+            "collection": collections.get(collection_id, collection_id),
+            "scope": scope,
+            "type": segment_type,
+        }
+        if scope == "METADATA":
+            segment["live_records"] = live_counts.get(segment_id, 0)
+        else:
+            segment_dir = os.path.join(db_path, segment_id)
+            files = _directory_size(segment_dir)
+            header = read_hnsw_header(segment_dir)
+            segment["files"] = files
+            segment["bytes"] = sum(files.values())
+            if header:
+                elements = header["cur_element_count"]
+                tombstones = count_hnsw_tombstones(segment_dir, header)
+                segment["elements"] = elements
+                segment["capacity"] = header["max_elements"]
+                segment["tombstones"] = tombstones
+                segment["tombstone_ratio"] = tombstones / elements if elements else 0.0
+        segment_reports.append(segment)
+
+    return {
+        "path": os.path.realpath(db_path),
+        "sqlite_bytes": os.path.getsize(sqlite_path),
+        "sqlite_pages": page_count,
+        "sqlite_free_pages": freelist_count,
+        "sqlite_free_ratio": freelist_count / page_count if page_count else 0.0,
+        "sqlite_page_size": page_size,
+        "queue_operations": queue_ops,
+        "latest_seq_id": latest_seq_id,
+        "segments": segment_reports,
+    }
+
+
+def needs_compaction(report: Dict[str, Any], max_tombstone_ratio: float = 0.2,
+                     max_free_ratio: float = 0.25) -> bool:
+    """Decide from a store_report() whether compaction is worthwhile"""
+    if report["sqlite_free_ratio"] > max_free_ratio:
+        return True
+    return any(
+        segment.get("tombstone_ratio", 0.0) > max_tombstone_ratio
+        for segment in report["segments"]
+    )
+
+
+def _rebuild_collections(source_path: str, staging_path: str, batch_size: int = 500) -> int:
+    """Copy every collection into a fresh store, which rebuilds each HNSW segment without tombstones"""
+    import chromadb
+
+    source = chromadb.PersistentClient(path=source_path)
+    target = chromadb.PersistentClient(path=staging_path)
+    copied = 0
+
+    for listed in source.list_collections():
+        name = listed if isinstance(listed, str) else listed.name
+        source_collection = source.get_collection(name, embedding_function=None)
+
+        # The staging catalog is a VACUUM INTO copy, so drop its stale collection first
+        try:
+            target.delete_collection(name)
+        except Exception:
+            pass
+        target_collection = target.create_collection(
+            name=name,
+            metadata=source_collection.metadata,
+            embedding_function=None,
+        )
+
+        offset = 0
+        while True:
+            batch = source_collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=batch_size,
+                offset=offset,
+            )
+            if not batch["ids"]:
+                break
+            target_collection.add(
+                ids=batch["ids"],
+                embeddings=batch["embeddings"],
+                documents=batch["documents"],
+                metadatas=batch["metadatas"],
+            )
+            copied += len(batch["ids"])
+            offset += len(batch["ids"])
+
+    # Release the staging files before they are published
+    if hasattr(target, "clear_system_cache"):
+        target.clear_system_cache()
+    return copied
+
+
+def _lock(path: str, mode: int, blocking: bool = True):
+    """Open path and flock it; returns the open file, or None if non-blocking and held elsewhere"""
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, mode if blocking else mode | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+@contextmanager
+def open_store(db_path: str = "./db", write: bool = False):
+    """
+    Yield a chromadb client on the live generation, holding a lease on it until exit.
+
+    The client is opened on the generation directory, not on the db_path symlink, so a
+    swap never mixes files of two generations under an open client. Pass write=True for
+    clients that add or delete data; compaction does not publish while one is open.
+    """
+    import chromadb
+
+    db_path = os.path.normpath(db_path)
+    held = []
+    try:
+        if write:
+            # Blocks only while a compaction is checking and swapping
+            held.append(_lock(f"{db_path}{WRITER_LOCK_SUFFIX}", fcntl.LOCK_SH))
+        while True:
+            generation_path = os.path.realpath(db_path)
+            lease = _lock(f"{generation_path}{LEASE_SUFFIX}", fcntl.LOCK_SH)
+            # The generation may have been swapped out and pruned before the lease was taken
+            if os.path.isdir(generation_path):
+                held.append(lease)
+                break
+            lease.close()
+        yield chromadb.PersistentClient(path=generation_path)
+    finally:
+        for lock_file in held:
+            lock_file.close()
+
+
+def is_generation_layout(db_path: str) -> bool:
+    """True if db_path is a symlink to a generation directory, which compaction requires"""
+    return os.path.islink(os.path.normpath(db_path))
+
+
+def convert_to_generations(db_path: str = "./db") -> str:
+    """
+    One-time, offline conversion of a plain store directory into the generation layout.
+
+    The directory is renamed to a generation and db_path becomes a symlink to it. The
+    two renames cannot be done in one atomic step, so this refuses to run while a client
+    holds the store open through open_store(). Returns the generation path.
+    """
+    db_path = os.path.normpath(db_path)
+    if is_generation_layout(db_path):
+        return os.path.realpath(db_path)
+    if not os.path.isdir(db_path):
+        raise FileNotFoundError(f"No Chroma store at {db_path}")
+
+    writer_lock = _lock(f"{db_path}{WRITER_LOCK_SUFFIX}", fcntl.LOCK_EX, blocking=False)
+    lease = _lock(f"{db_path}{LEASE_SUFFIX}", fcntl.LOCK_EX, blocking=False)
+    try:
+        if writer_lock is None or lease is None:
+            raise RuntimeError(f"{db_path} is open in another client; close it before converting")
+        generation_path = _convert(db_path)
+        # Clients of the converted store take their lease on the generation instead
+        os.remove(f"{db_path}{LEASE_SUFFIX}")
+        return generation_path
+    finally:
+        for lock_file in (writer_lock, lease):
+            if lock_file:
+                lock_file.close()
+
+
+def _convert(db_path: str) -> str:
+    """Rename the store directory to a generation and link db_path to it"""
+    generation_path = f"{db_path}{GENERATION_PREFIX}{int(time.time() * 1000)}"
+    swap_link = f"{db_path}.swap"
+    if os.path.lexists(swap_link):
+        os.remove(swap_link)
+    # Prepare the link first so db_path is missing only between the two renames
+    os.symlink(os.path.basename(generation_path), swap_link)
+    os.rename(db_path, generation_path)
+    os.replace(swap_link, db_path)
+    return generation_path
+
+
+def _publish_generation(db_path: str, generation_path: str) -> None:
+    """Repoint the db_path symlink at generation_path in one atomic rename"""
+    db_path = os.path.normpath(db_path)
+    if not is_generation_layout(db_path):
+        raise RuntimeError(f"{db_path} is not a generation symlink; run convert_to_generations() first")
+
+    # The new link is complete under a temporary name; os.replace swaps it in, so db_path
+    # always resolves to either the old or the new generation
+    swap_link = f"{db_path}.swap"
+    if os.path.lexists(swap_link):
+        os.remove(swap_link)
+    os.symlink(os.path.basename(generation_path), swap_link)
+    os.replace(swap_link, db_path)
+
+
+def prune_generations(db_path: str = "./db", keep: int = 1) -> List[str]:
+    """
+    Delete old generation directories, keeping the live one plus `keep` previous ones.
+
+    A generation that a client still holds open through open_store() is skipped and
+    removed by a later call, once that client has closed or reopened the store.
+    """
+    db_path = os.path.normpath(db_path)
+    parent = os.path.dirname(db_path) or "."
+    base = os.path.basename(db_path)
+    live = os.path.realpath(db_path)
+
+    generations = sorted(
+        os.path.join(parent, name) for name in os.listdir(parent)
+        if name.startswith(base + GENERATION_PREFIX) and os.path.isdir(os.path.join(parent, name))
+    )
+    old = [path for path in generations if os.path.realpath(path) != live]
+    removed = []
+    for path in (old[:-keep] if keep > 0 else old):
+        lease_path = f"{os.path.realpath(path)}{LEASE_SUFFIX}"
+        lease = _lock(lease_path, fcntl.LOCK_EX, blocking=False)
+        if lease is None:
+            continue
+        try:
+            shutil.rmtree(path, ignore_errors=True)
+            os.remove(lease_path)
+        finally:
+            lease.close()
+        removed.append(path)
+    return removed
+
+
+def compact_store(db_path: str = "./db", batch_size: int = 500) -> Optional[str]:
+    """
+    Compact the store into a new generation and publish it atomically.
+
+    Clients keep using the current generation while the new one is built. The check that
+    nothing was written and the swap both run under the exclusive writer lock, so the
+    swap is skipped (None is returned) if a writer is open or wrote during the rebuild.
+    """
+    db_path = os.path.normpath(db_path)
+    if not is_generation_layout(db_path):
+        # A plain directory cannot be swapped for a symlink atomically, so refuse before any work
+        raise RuntimeError(
+            f"{db_path} is a plain directory; convert it once with "
+            f"'python db_maintenance.py convert --path {db_path}' while no client has it open"
+        )
+    writer_lock_path = f"{db_path}{WRITER_LOCK_SUFFIX}"
+    # Cheap early check, so a rebuild is not wasted while a writer is open
+    writer_lock = _lock(writer_lock_path, fcntl.LOCK_EX, blocking=False)
+    if writer_lock is None:
+        print("⚠️  A writer has the store open; skipping compaction")
+        return None
+    writer_lock.close()
+
+    live_path = os.path.realpath(db_path)
+    sqlite_path = os.path.join(live_path, SQLITE_FILE)
+    staging_path = f"{db_path}{STAGING_PREFIX}{int(time.time() * 1000)}"
+    os.makedirs(staging_path)
+
+    try:
+        before = store_report(live_path)["latest_seq_id"]
+
+        # VACUUM INTO only needs a read transaction on the live catalog
+        conn = sqlite3.connect(sqlite_path)
+        try:
+            conn.execute("VACUUM INTO ?", (os.path.join(staging_path, SQLITE_FILE),))
+        finally:
+            conn.close()
+
+        copied = _rebuild_collections(live_path, staging_path, batch_size)
+
+        conn = sqlite3.connect(os.path.join(staging_path, SQLITE_FILE))
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+        # New writers wait on this lock until the swap is done, then open the new generation
+        writer_lock = _lock(writer_lock_path, fcntl.LOCK_EX, blocking=False)
+        if writer_lock is None:
+            print("⚠️  A writer opened the store during compaction; keeping current generation")
+            shutil.rmtree(staging_path, ignore_errors=True)
+            return None
+        try:
+            if store_report(live_path)["latest_seq_id"] != before:
+                print("⚠️  Store changed during compaction; keeping current generation")
+                shutil.rmtree(staging_path, ignore_errors=True)
+                return None
+
+            generation_path = staging_path.replace(STAGING_PREFIX, GENERATION_PREFIX)
+            os.rename(staging_path, generation_path)
+            _publish_generation(db_path, generation_path)
+        finally:
+            writer_lock.close()
+        print(f"✅ Compacted {copied} records into {os.path.basename(generation_path)}")
+        return generation_path
+
+    except Exception:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+
+
+class StoreCompactor(threading.Thread):
+    """Background thread that checks the store periodically and compacts it when needed"""
+
+    def __init__(self, db_path: str = "./db", interval: float = 3600.0,
+                 max_tombstone_ratio: float = 0.2, max_free_ratio: float = 0.25,
+                 keep_generations: int = 1,
+                 on_swap: Optional[Callable[[str], None]] = None):
+        super().__init__(name="chroma-store-compactor", daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.max_tombstone_ratio = max_tombstone_ratio
+        self.max_free_ratio = max_free_ratio
+        self.keep_generations = keep_generations
+        self.on_swap = on_swap
+        self.last_report: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[Exception] = None
+        self._stop_event = threading.Event()
+
+    def run_once(self) -> Optional[str]:
+        """Run a single check-and-compact cycle"""
+        self.last_report = store_report(self.db_path)
+        if not needs_compaction(self.last_report, self.max_tombstone_ratio, self.max_free_ratio):
+            return None
+
+        generation_path = compact_store(self.db_path)
+        if generation_path:
+            prune_generations(self.db_path, self.keep_generations)
+            # Open clients stay on their old generation (which is not pruned while they hold
+            # it) until they reopen the store through open_store()
+            if self.on_swap:
+                self.on_swap(generation_path)
+        return generation_path
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                print(f"❌ Store compaction failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        self.join(timeout)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a store_report() in a readable form"""
+    print(f"📦 Chroma store: {report['path']}")
+    print(f"   SQLite: {report['sqlite_bytes'] / 1024:.1f} KiB, "
+          f"{report['sqlite_free_pages']}/{report['sqlite_pages']} free pages "
+          f"({report['sqlite_free_ratio']:.1%})")
+    ops = ", ".join(f"{name}={count}" for name, count in report["queue_operations"].items())
+    print(f"   Queue operations: {ops}")
+    for segment in report["segments"]:
+        print(f"   • {segment['collection']} [{segment['scope']}] {segment['segment_id']}")
+        if "live_records" in segment:
+            print(f"     live records: {segment['live_records']}")
+        if "bytes" in segment:
+            print(f"     files: {segment['bytes'] / 1024:.1f} KiB {json.dumps(segment['files'])}")
+        if "elements" in segment:
+            print(f"     elements: {segment['elements']}/{segment['capacity']}, "
+                  f"tombstones: {segment['tombstones']} ({segment['tombstone_ratio']:.1%})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report on and compact the persisted Chroma store")
+    parser.add_argument("command", choices=["report", "convert", "compact"])
+    parser.add_argument("--path", default="./db", help="Chroma persist directory")
+    parser.add_argument("--force", action="store_true", help="Compact even below thresholds")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        generation_path = convert_to_generations(args.path)
+        print(f"✅ {args.path} now points to {os.path.basename(generation_path)}")
+        return
+
+    report = store_report(args.path)
+    if args.command == "report":
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)
+        return
+
+    if args.force or needs_compaction(report):
+        if compact_store(args.path):
+            prune_generations(args.path)
+            print_report(store_report(args.path))
+    else:
+        print("✅ Store is within thresholds; nothing to compact")
+
+
+if __name__ == "__main__":
+    main()